@@ -0,0 +1,58 @@
+from pymongo.errors import BulkWriteError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+ARCHIVE_SUFFIX = "_archive"
+DUPLICATE_KEY = 11000
+
+
+def archive_name(collection: str) -> str:
+    return f"{collection}{ARCHIVE_SUFFIX}"
+
+
+async def find_one_with_archive(
+    db: AsyncIOMotorDatabase, collection: str, query: dict, *args, **kwargs
+) -> dict | None:
+    """`find_one` on the hot collection, falling back to its archive on a miss."""
+    doc = await db[collection].find_one(query, *args, **kwargs)
+    if doc is None:
+        doc = await db[archive_name(collection)].find_one(query, *args, **kwargs)
+    return doc
+
+
+async def move_to_archive(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    query: dict,
+    batch_size: int,
+    max_batches: int,
+) -> int:
+    """
+    Move documents matching `query` to the archive in bounded batches.
+
+    Each batch is copied first and deleted afterwards, re-checking `query`, so
+    an interrupted run leaves documents duplicated (and skipped as such on the
+    next run) but never lost. Returns the number of documents moved.
+    """
+    moved = 0
+    for _ in range(max_batches):
+        docs = (
+            await db[collection]
+            .find(query)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            break
+        try:
+            await db[archive_name(collection)].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != DUPLICATE_KEY for err in errors):
+                raise
+        res = await db[collection].delete_many(
+            {"$and": [{"_id": {"$in": [d["_id"] for d in docs]}}, query]}
+        )
+        moved += res.deleted_count
+        if len(docs) < batch_size:
+            break
+    return moved
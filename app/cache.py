@@ -0,0 +1,63 @@
+import time
+
+from typing import Any
+from collections import OrderedDict
+from collections.abc import Hashable
+
+_caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache whose entries expire after `ttl` seconds.
+
+    `clear()` bumps a generation counter; values computed from a read that
+    started before the last invalidation are dropped by `set()` so a slow read
+    cannot repopulate the cache with stale data.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        _caches[name] = self
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._data.pop(key, None)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        if self.ttl <= 0 or (generation is not None and generation != self.generation):
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.invalidations += 1
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -9,6 +9,7 @@ ENV = os.getenv("ENV", "dev")
 
 
 def load_api_description() -> str:
+    """Read lazily, when the OpenAPI schema is first built."""
     return Path("docs/api_description.md").read_text(encoding="utf-8")
 
 
@@ -17,7 +18,6 @@ class FastAPIConfig:
     def dict(cls):
         return {
             "title": os.getenv("API_TITLE", "FastAPI"),
-            "description": load_api_description(),
             "version": os.getenv("API_VERSION", "1.0.0"),
             "contact": {
                 "name": os.getenv("API_CONTACT_NAME", "API Support"),
@@ -36,6 +36,120 @@ class CorsConfig:
     max_age = int(os.getenv("CORS_MAX_AGE", "600"))
 
 
+def _max_staleness(raw: str) -> int:
+    """-1 means no bound; MongoDB rejects any other value under 90 seconds."""
+    value = int(raw)
+    if value != -1 and value < 90:
+        raise ValueError(
+            f"MONGO_BROWSE_MAX_STALENESS_SECONDS must be -1 or at least 90, got {value}"
+        )
+    return value
+
+
 class DatabaseConfig:
     uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     name = os.getenv("DATABASE_NAME", "mongodb")
+    browse_read_preference = os.getenv(
+        "MONGO_BROWSE_READ_PREFERENCE", "secondaryPreferred"
+    )
+    browse_max_staleness = _max_staleness(
+        os.getenv("MONGO_BROWSE_MAX_STALENESS_SECONDS", "90")
+    )
+    browse_read_concern = os.getenv("MONGO_BROWSE_READ_CONCERN", "local")
+
+
+class CacheConfig:
+    facets_ttl = float(os.getenv("FACETS_CACHE_TTL_SECONDS", "30"))
+
+
+class ExpiryConfig:
+    drain_seconds = int(os.getenv("EXPIRY_DRAIN_SECONDS", "10"))
+    queue_max = int(os.getenv("EXPIRY_QUEUE_MAX", "10000"))
+    poll_max_age = int(os.getenv("RESERVATION_POLL_MAX_AGE_SECONDS", "5"))
+
+
+class ArchiveConfig:
+    reservations_after_days = int(os.getenv("ARCHIVE_RESERVATIONS_AFTER_DAYS", "7"))
+    events_after_days = int(os.getenv("ARCHIVE_EVENTS_AFTER_DAYS", "1"))
+    batch_size = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+    max_batches = int(os.getenv("ARCHIVE_MAX_BATCHES", "20"))
+
+
+class LimiterConfig:
+    enabled = os.getenv("LIMITER_ENABLED", "true").lower() == "true"
+    max_inflight = int(os.getenv("LIMITER_MAX_INFLIGHT", "256"))
+    retry_after = int(os.getenv("LIMITER_RETRY_AFTER_SECONDS", "1"))
+    # Route groups in priority order: (max in-flight, max queued, queue timeout s)
+    groups = {
+        name: {
+            "max_inflight": int(os.getenv(f"LIMITER_{name.upper()}_MAX_INFLIGHT", a)),
+            "max_queue": int(os.getenv(f"LIMITER_{name.upper()}_MAX_QUEUE", b)),
+            "queue_timeout": float(
+                os.getenv(f"LIMITER_{name.upper()}_QUEUE_TIMEOUT_SECONDS", c)
+            ),
+        }
+        for name, (a, b, c) in {
+            "checkout": ("128", "512", "5"),
+            "default": ("32", "64", "2"),
+            "browse": ("128", "256", "0.5"),
+        }.items()
+    }
+
+
+class TelemetryConfig:
+    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    trace_sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+    trace_exporter = os.getenv("TRACE_EXPORTER", "file")  # file | stdout | none
+    trace_export_path = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+
+
+class ProfilingConfig:
+    # Requests carrying `X-Profile-Token: <token>` are profiled
+    token = os.getenv("PROFILE_TOKEN", "")
+    sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    directory = os.getenv("PROFILE_DIR", "profiles")
+    keep = int(os.getenv("PROFILE_KEEP", "50"))
+    enabled = bool(token) or sample_rate > 0
+
+
+class DeliveryConfig:
+    enabled = os.getenv("DELIVERY_ENABLED", "true").lower() == "true"
+    workers = int(os.getenv("DELIVERY_WORKERS", "4"))
+    queue_size = int(os.getenv("DELIVERY_QUEUE_SIZE", "16"))
+    poll_seconds = float(os.getenv("DELIVERY_POLL_SECONDS", "2"))
+    lease_seconds = int(os.getenv("DELIVERY_LEASE_SECONDS", "300"))
+    max_attempts = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "8"))
+    backoff_base = float(os.getenv("DELIVERY_BACKOFF_SECONDS", "5"))
+    backoff_max = float(os.getenv("DELIVERY_BACKOFF_MAX_SECONDS", "900"))
+    render_processes = int(os.getenv("DELIVERY_RENDER_PROCESSES", "2"))
+    tickets_per_email = int(os.getenv("DELIVERY_TICKETS_PER_EMAIL", "50"))
+
+
+class MailConfig:
+    transport = os.getenv("MAIL_TRANSPORT", "file")  # file | smtp
+    sender = os.getenv("MAIL_FROM", "tickets@example.com")
+    outbox_dir = os.getenv("MAIL_OUTBOX_DIR", "mail_outbox")
+    smtp_host = os.getenv("SMTP_HOST", "localhost")
+    smtp_port = int(os.getenv("SMTP_PORT", "587"))
+    smtp_user = os.getenv("SMTP_USER", "")
+    smtp_password = os.getenv("SMTP_PASSWORD", "")
+    smtp_starttls = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    smtp_timeout = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+
+
+class ScanConfig:
+    token = os.getenv("SCAN_TOKEN") or None
+    write_timeout = float(os.getenv("SCAN_WRITE_TIMEOUT_SECONDS", "1.5"))
+    refresh_seconds = float(os.getenv("SCAN_REFRESH_SECONDS", "5"))
+    bloom_error_rate = float(os.getenv("SCAN_BLOOM_ERROR_RATE", "0.001"))
+    max_batch = int(os.getenv("SCAN_MAX_BATCH", "5000"))
+    max_events = int(os.getenv("SCAN_MAX_EVENTS", "64"))
+    pending_max = int(os.getenv("SCAN_PENDING_MAX", "100000"))
+    flush_seconds = int(os.getenv("SCAN_FLUSH_SECONDS", "10"))
+
+
+class StartupConfig:
+    defer_seconds = float(os.getenv("STARTUP_DEFER_SECONDS", "5"))
+    index_retry_seconds = float(os.getenv("STARTUP_INDEX_RETRY_SECONDS", "5"))
+    ready_timeout = float(os.getenv("READY_TIMEOUT_SECONDS", "1"))
@@ -1,23 +1,99 @@
 import motor.motor_asyncio
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
 
 from app.config import DatabaseConfig
 
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def _read_preference(mode: str, max_staleness: int):
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+
+# Read routing per kind of endpoint:
+# - "primary": inventory-critical reads that are followed by writes.
+# - "browse": catalog and receipt reads that tolerate bounded staleness.
+READ_ROUTES = {
+    "primary": (Primary(), ReadConcern()),
+    "browse": (
+        _read_preference(
+            DatabaseConfig.browse_read_preference, DatabaseConfig.browse_max_staleness
+        ),
+        ReadConcern(DatabaseConfig.browse_read_concern),
+    ),
+}
+
+_client: AsyncIOMotorClient | None = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """
+    Return the process-wide Motor client, creating it on first use.
+
+    Sharing the client keeps its connection pool and replica set topology warm,
+    which secondary reads need to actually reach a secondary.
+    """
+    global _client
+    if _client is None:
+        _client = motor.motor_asyncio.AsyncIOMotorClient(DatabaseConfig.uri)
+    return _client
+
+
+def close_client() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Create the secondary indexes the hot queries rely on (idempotent)."""
+    # Expiry sweep: PENDING reservations past expires_at
+    await db.reservations.create_index([("status", 1), ("expires_at", 1)])
+    # Archiver cutoff for past events, also used by `sort=date`
+    await db.events.create_index("date")
+    # Gate scan index loads: an event's purchases in id order, and its scans
+    await db.purchases.create_index([("event_id", 1), ("_id", 1)])
+    await db.ticket_scans.create_index("event_id")
+    # Ticket delivery outbox: due PENDING purchases, and backlog counts
+    await db.purchases.create_index(
+        [("delivery.status", 1), ("delivery.next_attempt_at", 1)]
+    )
+
 
 class MongoDBConnectionManager:
-    def __init__(self) -> None:
+    def __init__(self, route: str = "primary") -> None:
         self.uri: str = DatabaseConfig.uri
         self.db_name: str = DatabaseConfig.name
+        self.route: str = route
         self.client: AsyncIOMotorClient | None = None
         self.db: AsyncIOMotorDatabase | None = None
 
     async def __aenter__(self) -> AsyncIOMotorDatabase:
-        self.client = motor.motor_asyncio.AsyncIOMotorClient(self.uri)
-        self.db = self.client[self.db_name]
+        read_preference, read_concern = READ_ROUTES[self.route]
+        self.client = get_client()
+        self.db = self.client.get_database(
+            self.db_name, read_preference=read_preference, read_concern=read_concern
+        )
         return self.db
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
         _ = exc_type, exc_val, exc_tb
-        if self.client:
-            self.client.close()
+        self.db = None
@@ -0,0 +1,374 @@
+import time
+import random
+import asyncio
+import logging
+import multiprocessing
+
+from typing import Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.config import DeliveryConfig, MailConfig
+from app.database import MongoDBConnectionManager
+from app.mailer import MailTransport, get_transport
+from app.models.purchase import Ticket, TicketRange
+from app.qr import render_qr_svgs
+
+logger = logging.getLogger("app.delivery")
+
+# Window for the tickets-per-second throughput figure
+THROUGHPUT_WINDOW = 60
+
+
+def new_delivery(now: datetime) -> dict:
+    """Outbox entry stored inside the purchase, so it is written atomically."""
+    return {
+        "status": "PENDING",
+        "attempts": 0,
+        "emails_sent": 0,
+        "next_attempt_at": now,
+        "last_error": None,
+        "delivered_at": None,
+    }
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter."""
+    cap = min(DeliveryConfig.backoff_max, DeliveryConfig.backoff_base * 2**attempts)
+    return random.uniform(cap / 2, cap)
+
+
+def purchase_tickets(purchase: dict) -> list[Ticket]:
+    return [t for r in purchase["ticket_ranges"] for t in TicketRange(**r).tickets()]
+
+
+def build_message(
+    purchase: dict, tickets: list[Ticket], images: list[bytes], part: int, parts: int
+) -> EmailMessage:
+    message = EmailMessage()
+    suffix = f" ({part + 1}/{parts})" if parts > 1 else ""
+    message["Subject"] = f"Tus tickets{suffix}"
+    message["From"] = MailConfig.sender
+    message["To"] = purchase["buyer"]["email"]
+    # Stable across retries, so a re-sent part can be recognized as such
+    message["Message-ID"] = f"<{purchase['_id']}.{part}@ulatickets>"
+
+    lines = [f"Hola {purchase['buyer']['name']},", "", "Estos son tus tickets:"]
+    for t in tickets:
+        line = f"- {t.code} · {t.type}"
+        if t.seat:
+            line += (
+                f" (sección {t.seat.section}, fila {t.seat.row}, asiento {t.seat.seat})"
+            )
+        lines.append(line)
+    message.set_content("\n".join(lines))
+    for t, svg in zip(tickets, images):
+        message.add_attachment(
+            svg, maintype="image", subtype="svg+xml", filename=f"{t.code}.svg"
+        )
+    return message
+
+
+class DeliveryWorkers:
+    """
+    Background pool delivering ticket emails from the purchases outbox.
+
+    A poller claims due purchases with a lease (`next_attempt_at` pushed ahead)
+    only while the bounded in-memory queue has room, so a backlog stays in
+    MongoDB instead of in memory. Workers render QR codes in a process pool,
+    prefetching the next email's codes while the current one is sent, and
+    record progress per email so a retry resumes where it stopped. Each email
+    sent renews the lease, and a worker whose claim was taken over stops right
+    away. Delivery is still at least once: the email in flight when a lease
+    expires may be repeated.
+    """
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(DeliveryConfig.queue_size)
+        self.wake = asyncio.Event()
+        self.tasks: list[asyncio.Task] = []
+        self.pool: ProcessPoolExecutor | None = None
+        self.transport: MailTransport | None = None
+        self.inflight = 0
+        self.counters = {
+            "claimed": 0,
+            "delivered": 0,
+            "retried": 0,
+            "failed": 0,
+            "lease_lost": 0,
+            "emails_sent": 0,
+            "tickets_sent": 0,
+            "render_seconds": 0.0,
+            "send_seconds": 0.0,
+        }
+        self._sent_log: deque[tuple[float, int]] = deque()
+
+    def start(self) -> None:
+        # Spawned workers: forking a process that runs threads is unsafe
+        self.pool = ProcessPoolExecutor(
+            DeliveryConfig.render_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.transport = get_transport()
+        self.tasks = [asyncio.create_task(self._poll())] + [
+            asyncio.create_task(self._work()) for _ in range(DeliveryConfig.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        # Hand claimed but unstarted purchases back right away
+        unstarted = []
+        while not self.queue.empty():
+            unstarted.append(self.queue.get_nowait())
+        if unstarted:
+            async with MongoDBConnectionManager() as db:
+                for purchase in unstarted:
+                    await self._update(
+                        db,
+                        purchase,
+                        {
+                            "$set": {"delivery.next_attempt_at": _now()},
+                            "$inc": {"delivery.attempts": -1},
+                        },
+                    )
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def notify(self) -> None:
+        """Wake the poller, e.g. right after a checkout."""
+        self.wake.set()
+
+    async def _claim(self, db: AsyncIOMotorDatabase) -> dict | None:
+        now = _now()
+        return await db.purchases.find_one_and_update(
+            {"delivery.status": "PENDING", "delivery.next_attempt_at": {"$lte": now}},
+            {
+                "$set": {
+                    "delivery.next_attempt_at": now
+                    + timedelta(seconds=DeliveryConfig.lease_seconds)
+                },
+                "$inc": {"delivery.attempts": 1},
+            },
+            projection={"ticket_ranges": 1, "buyer": 1, "delivery": 1},
+            sort=[("delivery.next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _poll(self) -> None:
+        while True:
+            self.wake.clear()
+            try:
+                async with MongoDBConnectionManager() as db:
+                    while not self.queue.full():
+                        purchase = await self._claim(db)
+                        if purchase is None:
+                            break
+                        self.counters["claimed"] += 1
+                        await self.queue.put(purchase)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("delivery poll failed")
+            try:
+                await asyncio.wait_for(self.wake.wait(), DeliveryConfig.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _work(self) -> None:
+        while True:
+            purchase = await self.queue.get()
+            self.inflight += 1
+            try:
+                async with MongoDBConnectionManager() as db:
+                    await self._deliver(db, purchase)
+            except Exception:
+                # The lease expires and another attempt picks the purchase up
+                logger.exception(
+                    "ticket delivery crashed",
+                    extra={"purchase_id": str(purchase["_id"])},
+                )
+            finally:
+                self.inflight -= 1
+                self.queue.task_done()
+                self.wake.set()  # Room in the queue again
+
+    async def _update(
+        self, db: AsyncIOMotorDatabase, purchase: dict, update: dict
+    ) -> bool:
+        """Write under the current claim; False once another worker holds it."""
+        res = await db.purchases.update_one(
+            {
+                "_id": purchase["_id"],
+                "delivery.attempts": purchase["delivery"]["attempts"],
+            },
+            update,
+        )
+        return res.matched_count == 1
+
+    def _lease_lost(self, purchase: dict) -> None:
+        self.counters["lease_lost"] += 1
+        logger.warning(
+            "ticket delivery lease lost",
+            extra={"purchase_id": str(purchase["_id"])},
+        )
+
+    async def _render(self, tickets: list[Ticket]) -> list[bytes]:
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        images = await loop.run_in_executor(
+            self.pool, render_qr_svgs, [t.code for t in tickets]
+        )
+        self.counters["render_seconds"] += time.perf_counter() - start
+        return images
+
+    async def _deliver(self, db: AsyncIOMotorDatabase, purchase: dict) -> None:
+        delivery = purchase["delivery"]
+        tickets = purchase_tickets(purchase)
+        size = DeliveryConfig.tickets_per_email
+        chunks = [tickets[i : i + size] for i in range(0, len(tickets), size)]
+        next_render = None
+        try:
+            if delivery["emails_sent"] < len(chunks):
+                next_render = asyncio.ensure_future(
+                    self._render(chunks[delivery["emails_sent"]])
+                )
+            for part in range(delivery["emails_sent"], len(chunks)):
+                images = await next_render
+                next_render = None
+                if part + 1 < len(chunks):
+                    next_render = asyncio.ensure_future(self._render(chunks[part + 1]))
+                message = build_message(
+                    purchase, chunks[part], images, part, len(chunks)
+                )
+                start = time.perf_counter()
+                await self.transport.send(message)
+                self.counters["send_seconds"] += time.perf_counter() - start
+                self._record_sent(len(chunks[part]))
+                # Record progress and renew the lease, so a long healthy send
+                # is not reclaimed; a miss means another worker took over
+                held = await self._update(
+                    db,
+                    purchase,
+                    {
+                        "$set": {
+                            "delivery.emails_sent": part + 1,
+                            "delivery.next_attempt_at": _now()
+                            + timedelta(seconds=DeliveryConfig.lease_seconds),
+                        }
+                    },
+                )
+                if not held:
+                    if next_render is not None:
+                        next_render.cancel()
+                    self._lease_lost(purchase)
+                    return
+        except Exception as e:
+            if next_render is not None:
+                next_render.cancel()
+            await self._fail(db, purchase, e)
+            return
+        held = await self._update(
+            db,
+            purchase,
+            {
+                "$set": {
+                    "delivery.status": "SENT",
+                    "delivery.delivered_at": datetime.now(timezone.utc),
+                    "delivery.last_error": None,
+                }
+            },
+        )
+        if not held:
+            self._lease_lost(purchase)
+            return
+        self.counters["delivered"] += 1
+
+    async def _fail(
+        self, db: AsyncIOMotorDatabase, purchase: dict, error: Exception
+    ) -> None:
+        attempts = purchase["delivery"]["attempts"]
+        final = attempts >= DeliveryConfig.max_attempts
+        update: dict = {"delivery.last_error": f"{type(error).__name__}: {error}"[:500]}
+        if final:
+            update["delivery.status"] = "FAILED"
+        else:
+            update["delivery.next_attempt_at"] = _now() + timedelta(
+                seconds=retry_delay(attempts)
+            )
+        if not await self._update(db, purchase, {"$set": update}):
+            self._lease_lost(purchase)
+            return
+        self.counters["failed" if final else "retried"] += 1
+        logger.warning(
+            "ticket delivery failed",
+            extra={
+                "purchase_id": str(purchase["_id"]),
+                "attempts": attempts,
+                "final": final,
+                "error": update["delivery.last_error"],
+            },
+        )
+
+    def _record_sent(self, tickets: int) -> None:
+        now = time.monotonic()
+        self.counters["emails_sent"] += 1
+        self.counters["tickets_sent"] += tickets
+        self._sent_log.append((now, tickets))
+        while self._sent_log and self._sent_log[0][0] < now - THROUGHPUT_WINDOW:
+            self._sent_log.popleft()
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        recent = sum(n for ts, n in self._sent_log if ts >= now - THROUGHPUT_WINDOW)
+        return {
+            "running": bool(self.tasks),
+            "queued": self.queue.qsize(),
+            "inflight": self.inflight,
+            **{
+                k: round(v, 3) if isinstance(v, float) else v
+                for k, v in self.counters.items()
+            },
+            "tickets_per_second": round(recent / THROUGHPUT_WINDOW, 2),
+        }
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+delivery_workers: DeliveryWorkers | None = None
+
+
+def start_delivery() -> None:
+    global delivery_workers
+    if DeliveryConfig.enabled and delivery_workers is None:
+        delivery_workers = DeliveryWorkers()
+        delivery_workers.start()
+
+
+async def stop_delivery() -> None:
+    global delivery_workers
+    if delivery_workers is not None:
+        await delivery_workers.stop()
+        delivery_workers = None
+
+
+def notify_delivery() -> None:
+    if delivery_workers is not None:
+        delivery_workers.notify()
+
+
+async def delivery_stats(db: AsyncIOMotorDatabase) -> dict[str, Any]:
+    return {
+        "workers": delivery_workers.stats() if delivery_workers else None,
+        "pending": await db.purchases.count_documents({"delivery.status": "PENDING"}),
+        "failed": await db.purchases.count_documents({"delivery.status": "FAILED"}),
+    }
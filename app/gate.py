@@ -0,0 +1,386 @@
+import gzip
+import json
+import math
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+
+import pymongo
+
+from typing import Any
+from bson import ObjectId
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+
+from app.config import ScanConfig
+from app.database import MongoDBConnectionManager
+from app.models.purchase import TicketRange
+from app.models.scan import ScanRecord, ScanResult
+from app.singleflight import SingleFlight
+
+logger = logging.getLogger("app.gate")
+
+DUPLICATE_KEY = 11000
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+index_flight = SingleFlight("gate_index")
+
+
+class BloomFilter:
+    """
+    Bloom filter over ticket codes, with the k positions derived by double
+    hashing one 128-bit BLAKE2b digest. Gate devices can rebuild the same
+    lookups from the snapshot.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.m = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.capacity = capacity
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _positions(self, code: str) -> Iterable[int]:
+        digest = hashlib.blake2b(code.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, code: str) -> None:
+        for pos in self._positions(code):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, code: str) -> bool:
+        return all(
+            self.bits[pos >> 3] >> (pos & 7) & 1 for pos in self._positions(code)
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "hash": "blake2b-128, h1 + i*h2 (little endian halves, h2 odd)",
+            "m": self.m,
+            "k": self.k,
+            "bits": base64.b64encode(self.bits).decode(),
+        }
+
+
+def code_ranges(codes: Iterable[str]) -> tuple[list[list], list[str]]:
+    """
+    Compress codes into `[prefix, start, count]` runs; codes that do not follow
+    the `<prefix><seq:04>` format are returned as they are.
+    """
+    parsed, other = [], []
+    for code in codes:
+        prefix, sep, seq = code.rpartition("-")
+        if sep and seq.isdigit() and f"{int(seq):04}" == seq:
+            parsed.append((prefix + sep, int(seq)))
+        else:
+            other.append(code)
+    ranges: list[list] = []
+    for prefix, seq in sorted(parsed):
+        last = ranges[-1] if ranges else None
+        if last and last[0] == prefix and last[1] + last[2] == seq:
+            last[2] += 1
+        else:
+            ranges.append([prefix, seq, 1])
+    return ranges, sorted(other)
+
+
+def purchase_codes(purchase: dict) -> Iterable[str]:
+    for r in purchase.get("ticket_ranges") or []:
+        yield from TicketRange(**r).codes()
+    if not purchase.get("ticket_ranges"):
+        for t in purchase.get("tickets") or []:
+            yield t["code"]
+
+
+class GateIndex:
+    """
+    In-memory view of one event's issued codes, for scans that never wait on
+    the database to reject a code. Codes burned through this process are kept
+    in `used`; the unique `ticket_scans` insert stays the authority.
+
+    Each code maps to the purchase that holds it. A code found in more than
+    one purchase (issued before per-event numbering) goes to `conflicts` and
+    is never accepted automatically: each holder's ticket has to be checked
+    by hand.
+    """
+
+    def __init__(self, event_id: str) -> None:
+        self.event_id = event_id
+        self.codes: dict[str, ObjectId] = {}
+        self.conflicts: set[str] = set()
+        self.used: set[str] = set()
+        self.bloom = BloomFilter(1024, ScanConfig.bloom_error_rate)
+        self.last_purchase: ObjectId | None = None
+        self.refreshed_at = 0.0
+
+    def _add(self, code: str, purchase_id: ObjectId) -> None:
+        holder = self.codes.get(code)
+        if holder is not None:
+            if holder != purchase_id and code not in self.conflicts:
+                self.conflicts.add(code)
+                logger.warning(
+                    "ticket code issued twice",
+                    extra={
+                        "event_id": self.event_id,
+                        "code": code,
+                        "purchases": [str(holder), str(purchase_id)],
+                    },
+                )
+            return
+        self.codes[code] = purchase_id
+        if len(self.codes) > self.bloom.capacity:
+            # Keep the false positive rate: rebuild with room to grow
+            self.bloom = BloomFilter(2 * len(self.codes), ScanConfig.bloom_error_rate)
+            for c in self.codes:
+                self.bloom.add(c)
+        else:
+            self.bloom.add(code)
+
+    def issued(self, code: str) -> bool:
+        return code in self.bloom and code in self.codes
+
+    async def refresh(self, db: AsyncIOMotorDatabase) -> int:
+        """Load purchases confirmed since the last refresh; returns new codes."""
+        query: dict = {"event_id": self.event_id}
+        if self.last_purchase is not None:
+            # Ids come from each API process' clock: re-read a short overlap so
+            # a purchase with a slightly older id is not skipped
+            since = self.last_purchase.generation_time - REFRESH_OVERLAP
+            query["_id"] = {"$gt": ObjectId.from_datetime(since)}
+        before = len(self.codes)
+        cursor = db.purchases.find(query, {"ticket_ranges": 1, "tickets.code": 1}).sort(
+            "_id", 1
+        )
+        async for purchase in cursor:
+            for code in purchase_codes(purchase):
+                self._add(code, purchase["_id"])
+            self.last_purchase = max(
+                self.last_purchase or purchase["_id"], purchase["_id"]
+            )
+        self.refreshed_at = time.monotonic()
+        return len(self.codes) - before
+
+    async def load_used(self, db: AsyncIOMotorDatabase) -> None:
+        async for scan in db.ticket_scans.find(
+            {"event_id": self.event_id}, {"code": 1}
+        ):
+            self.used.add(scan["code"])
+
+
+_indexes: OrderedDict[str, GateIndex] = OrderedDict()
+
+# Scans accepted while the database was unreachable, written on the next flush
+_pending: list[dict] = []
+
+
+async def _build_index(event_id: str) -> GateIndex:
+    index = GateIndex(event_id)
+    async with MongoDBConnectionManager() as db:
+        await index.refresh(db)
+        await index.load_used(db)
+    return index
+
+
+async def get_index(event_id: str) -> GateIndex:
+    index = _indexes.get(event_id)
+    if index is None:
+        try:
+            index = await index_flight.do(event_id, lambda: _build_index(event_id))
+        except PyMongoError:
+            raise HTTPException(status_code=503, detail="Scan index unavailable")
+        _indexes[event_id] = index
+        while len(_indexes) > ScanConfig.max_events:
+            _indexes.popitem(last=False)
+    _indexes.move_to_end(event_id)
+    return index
+
+
+async def _refresh_if_stale(index: GateIndex) -> None:
+    """Pick up purchases made since the last load, at most every few seconds."""
+    if time.monotonic() - index.refreshed_at < ScanConfig.refresh_seconds:
+        return
+
+    async def refresh() -> int:
+        async with MongoDBConnectionManager() as db:
+            return await index.refresh(db)
+
+    try:
+        await index_flight.do(("refresh", index.event_id), refresh)
+    except PyMongoError:
+        index.refreshed_at = time.monotonic()  # Back off while the DB is down
+
+
+def _scan_doc(event_id: str, code: str, gate: str | None, at: datetime) -> dict:
+    return {
+        "_id": f"{event_id}:{code}",
+        "event_id": event_id,
+        "code": code,
+        "gate": gate,
+        "scanned_at": at,
+        # Tells a retried write of this same scan apart from another scan
+        "scan_id": ObjectId(),
+    }
+
+
+async def scan_code(event_id: str, code: str, gate: str | None) -> ScanResult:
+    index = await get_index(event_id)
+    if not index.issued(code):
+        await _refresh_if_stale(index)
+        if not index.issued(code):
+            return ScanResult(code=code, status="INVALID")
+    if code in index.conflicts:
+        return ScanResult(code=code, status="CONFLICT")
+    if code in index.used:
+        return ScanResult(code=code, status="ALREADY_USED")
+
+    doc = _scan_doc(event_id, code, gate, datetime.now(timezone.utc))
+    try:
+        async with MongoDBConnectionManager() as db:
+            with pymongo.timeout(ScanConfig.write_timeout):
+                await db.ticket_scans.insert_one(doc)
+    except DuplicateKeyError:
+        index.used.add(code)
+        return ScanResult(code=code, status="ALREADY_USED")
+    except PyMongoError:
+        # Keep the gate moving: burn locally and write the scan later
+        if len(_pending) >= ScanConfig.pending_max:
+            raise HTTPException(status_code=503, detail="Scan backlog full")
+        _pending.append(doc)
+        index.used.add(code)
+        return ScanResult(code=code, status="VALID", offline=True)
+    index.used.add(code)
+    return ScanResult(code=code, status="VALID")
+
+
+async def scan_batch(event_id: str, scans: list[ScanRecord]) -> list[ScanResult]:
+    """
+    Settle scans collected offline by a gate device, oldest first: the first
+    read of a code wins, later reads (here or at any other gate) are reported
+    as `ALREADY_USED`.
+    """
+    index = await get_index(event_id)
+    ordered = sorted(enumerate(scans), key=lambda p: p[1].scanned_at)
+    if any(not index.issued(s.code) for _, s in ordered):
+        await _refresh_if_stale(index)
+
+    results: list[ScanResult | None] = [None] * len(scans)
+    docs, positions, seen = [], [], set()
+    for pos, s in ordered:
+        if not index.issued(s.code):
+            results[pos] = ScanResult(code=s.code, status="INVALID")
+        elif s.code in index.conflicts:
+            results[pos] = ScanResult(code=s.code, status="CONFLICT")
+        elif s.code in seen:
+            results[pos] = ScanResult(code=s.code, status="ALREADY_USED")
+        else:
+            seen.add(s.code)
+            docs.append(_scan_doc(event_id, s.code, s.gate, s.scanned_at))
+            positions.append(pos)
+
+    duplicates: set[int] = set()
+    if docs:
+        try:
+            async with MongoDBConnectionManager() as db:
+                with pymongo.timeout(ScanConfig.write_timeout * 4):
+                    await db.ticket_scans.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details["writeErrors"]:
+                if error["code"] != DUPLICATE_KEY:
+                    raise HTTPException(status_code=503, detail="Scan upload failed")
+                duplicates.add(error["index"])
+        except PyMongoError:
+            raise HTTPException(status_code=503, detail="Scan upload failed")
+
+    for n, (doc, pos) in enumerate(zip(docs, positions)):
+        status = "ALREADY_USED" if n in duplicates else "VALID"
+        results[pos] = ScanResult(code=doc["code"], status=status)
+        index.used.add(doc["code"])
+    return results
+
+
+async def flush_pending_scans() -> dict[str, int]:
+    """Write scans accepted offline; report double entries found meanwhile."""
+    if not _pending:
+        return {"written": 0, "conflicts": 0}
+    docs = _pending[:]
+    conflicts = 0
+    async with MongoDBConnectionManager() as db:
+        try:
+            await db.ticket_scans.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details["writeErrors"]
+            if any(err["code"] != DUPLICATE_KEY for err in errors):
+                raise
+            # A timed out write may have landed after all: only a different
+            # scan of the same code is a double entry
+            ours = {docs[err["index"]]["_id"]: docs[err["index"]] for err in errors}
+            async for stored in db.ticket_scans.find({"_id": {"$in": list(ours)}}):
+                if stored.get("scan_id") != ours[stored["_id"]]["scan_id"]:
+                    conflicts += 1
+                    logger.warning(
+                        "ticket used twice while offline",
+                        extra={
+                            "scan": stored["_id"],
+                            "gates": [stored["gate"], ours[stored["_id"]]["gate"]],
+                        },
+                    )
+    del _pending[: len(docs)]
+    return {"written": len(docs) - conflicts, "conflicts": conflicts}
+
+
+async def build_snapshot(event_id: str) -> bytes:
+    """
+    Gzipped JSON of an event's issued codes (as ranges), the codes already
+    used, and a Bloom filter of the still valid ones, for offline gates.
+    """
+    index = await get_index(event_id)
+    await _refresh_if_stale(index)
+    used = set(index.used)
+    try:
+        async with MongoDBConnectionManager() as db:
+            async for scan in db.ticket_scans.find({"event_id": event_id}, {"code": 1}):
+                used.add(scan["code"])
+    except PyMongoError:
+        pass  # Local view only; devices reconcile on batch upload
+    codes = set(index.codes)
+    conflicts = set(index.conflicts)
+
+    def encode() -> bytes:
+        valid = codes - used - conflicts
+        bloom = BloomFilter(len(valid), ScanConfig.bloom_error_rate)
+        for code in valid:
+            bloom.add(code)
+        ranges, other = code_ranges(codes)
+        snapshot = {
+            "event_id": event_id,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "issued": {"ranges": ranges, "codes": other},
+            "used": sorted(used & codes),
+            "conflicts": sorted(conflicts),
+            "valid_bloom": bloom.to_dict(),
+        }
+        return gzip.compress(json.dumps(snapshot, separators=(",", ":")).encode())
+
+    return await asyncio.to_thread(encode)
+
+
+def gate_stats() -> dict[str, Any]:
+    return {
+        "events": {
+            event_id: {
+                "codes": len(i.codes),
+                "used": len(i.used),
+                "conflicts": len(i.conflicts),
+            }
+            for event_id, i in _indexes.items()
+        },
+        "pending_offline": len(_pending),
+    }
@@ -0,0 +1,45 @@
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+
+async def highest_issued(db: AsyncIOMotorDatabase, event_id: str) -> int:
+    """Highest ticket sequence number in an event's purchases, or 0."""
+    highest = 0
+    cursor = db.purchases.find(
+        {"event_id": event_id},
+        {"ticket_ranges.start": 1, "ticket_ranges.count": 1, "tickets.code": 1},
+    )
+    async for purchase in cursor:
+        for r in purchase.get("ticket_ranges") or []:
+            highest = max(highest, r["start"] + r["count"] - 1)
+        # Purchases from before ticket ranges list each ticket
+        for t in purchase.get("tickets") or []:
+            seq = t["code"].rpartition("-")[2]
+            if seq.isdigit():
+                highest = max(highest, int(seq))
+    return highest
+
+
+async def seed_ticket_counter(db: AsyncIOMotorDatabase, event_oid: ObjectId) -> None:
+    """
+    Start an event's `tickets_issued` counter after the codes it already has.
+
+    Events from before the counter have none, and numbering them from 1 again
+    would hand out codes other buyers hold. `$max` keeps this idempotent and
+    safe against concurrent seeds and checkouts.
+    """
+    highest = await highest_issued(db, str(event_oid))
+    await db.events.update_one(
+        {"_id": event_oid}, {"$max": {"tickets_issued": highest}}
+    )
+
+
+async def seed_ticket_counters(db: AsyncIOMotorDatabase) -> int:
+    """Seed every event still without a counter; returns how many."""
+    seeded = 0
+    async for event in db.events.find(
+        {"tickets_issued": {"$exists": False}}, {"_id": 1}
+    ):
+        await seed_ticket_counter(db, event["_id"])
+        seeded += 1
+    return seeded
@@ -0,0 +1,171 @@
+import asyncio
+
+from typing import Any
+from collections import deque
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import LimiterConfig
+
+# Paths never limited: healthcheck, docs and admin endpoints
+EXEMPT_PREFIXES = ("/admin", "/docs", "/redoc", "/openapi.json", "/ready")
+
+
+class RouteGroup:
+    def __init__(
+        self, name: str, max_inflight: int, max_queue: int, queue_timeout: float
+    ) -> None:
+        self.name = name
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "inflight": self.inflight,
+            "queued": len(self.waiters),
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+
+class ConcurrencyLimiter:
+    """
+    Per-group in-flight limits with bounded FIFO queues under a global limit.
+
+    Groups are listed in priority order: when a slot frees up, waiters of the
+    first group with capacity are admitted before any later group, and a new
+    request never skips ahead of a queued higher-priority one. Requests that
+    find their queue full, or wait longer than the group's `queue_timeout`,
+    are shed.
+    """
+
+    def __init__(self, max_inflight: int, groups: list[RouteGroup]) -> None:
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.groups = {g.name: g for g in groups}
+        self._order = groups
+
+    @classmethod
+    def from_config(cls) -> "ConcurrencyLimiter":
+        return cls(
+            LimiterConfig.max_inflight,
+            [RouteGroup(name, **cfg) for name, cfg in LimiterConfig.groups.items()],
+        )
+
+    @staticmethod
+    def classify(method: str, path: str) -> str | None:
+        if path == "/" or path.startswith(EXEMPT_PREFIXES):
+            return None
+        if method == "POST" and (
+            path in ("/checkout", "/reservations")
+            or path.endswith(("/scan", "/scan/batch"))
+        ):
+            return "checkout"
+        if method in ("GET", "HEAD"):
+            return "browse"
+        return "default"
+
+    def _has_capacity(self, group: RouteGroup) -> bool:
+        return group.inflight < group.max_inflight and self.inflight < self.max_inflight
+
+    def _admit(self, group: RouteGroup) -> None:
+        group.inflight += 1
+        group.admitted += 1
+        self.inflight += 1
+
+    def _dispatch(self) -> None:
+        for group in self._order:
+            while group.waiters and self._has_capacity(group):
+                waiter = group.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(group)
+                waiter.set_result(True)
+
+    async def acquire(self, name: str) -> bool:
+        group = self.groups[name]
+        # Queued requests of this group, or of a higher-priority group waiting
+        # only for global capacity, go first
+        ahead = group.waiters or any(
+            g.waiters and g.inflight < g.max_inflight
+            for g in self._order[: self._order.index(group)]
+        )
+        if not ahead and self._has_capacity(group):
+            self._admit(group)
+            return True
+        if len(group.waiters) >= group.max_queue:
+            group.shed_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        group.waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=group.queue_timeout)
+        except BaseException:
+            # Client went away while queued; hand back a slot granted meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            else:
+                waiter.cancel()
+                group.waiters.remove(waiter)
+            raise
+        if waiter.done():
+            return True
+        waiter.cancel()
+        group.waiters.remove(waiter)
+        group.shed_timeout += 1
+        return False
+
+    def release(self, name: str) -> None:
+        group = self.groups[name]
+        group.inflight -= 1
+        self.inflight -= 1
+        self._dispatch()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "groups": {name: g.stats() for name, g in self.groups.items()},
+        }
+
+
+class LoadSheddingMiddleware:
+    """ASGI middleware answering `503` with `Retry-After` when over the limit."""
+
+    def __init__(self, app: ASGIApp, limiter: ConcurrencyLimiter) -> None:
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        group = self.limiter.classify(scope["method"], scope["path"])
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+        if not await self.limiter.acquire(group):
+            response = JSONResponse(
+                {"detail": "Server busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(LimiterConfig.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(group)
+
+
+limiter = ConcurrencyLimiter.from_config()
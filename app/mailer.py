@@ -0,0 +1,52 @@
+import asyncio
+import smtplib
+
+from pathlib import Path
+from typing import Protocol
+from email.message import EmailMessage
+
+from app.config import MailConfig
+
+
+class MailTransport(Protocol):
+    async def send(self, message: EmailMessage) -> None: ...
+
+
+class FileTransport:
+    """Local stand-in: write each message as an `.eml` file instead of sending."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+
+    def _write(self, message: EmailMessage) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = message["Message-ID"].strip("<>").replace("@", "_")
+        (self.directory / f"{name}.eml").write_bytes(message.as_bytes())
+
+    async def send(self, message: EmailMessage) -> None:
+        await asyncio.to_thread(self._write, message)
+
+
+class SmtpTransport:
+    """Blocking `smtplib` run in a worker thread, one connection per message."""
+
+    def _send(self, message: EmailMessage) -> None:
+        with smtplib.SMTP(
+            MailConfig.smtp_host, MailConfig.smtp_port, timeout=MailConfig.smtp_timeout
+        ) as smtp:
+            if MailConfig.smtp_starttls:
+                smtp.starttls()
+            if MailConfig.smtp_user:
+                smtp.login(MailConfig.smtp_user, MailConfig.smtp_password)
+            smtp.send_message(message)
+
+    async def send(self, message: EmailMessage) -> None:
+        await asyncio.to_thread(self._send, message)
+
+
+def get_transport() -> MailTransport:
+    if MailConfig.transport == "smtp":
+        return SmtpTransport()
+    if MailConfig.transport == "file":
+        return FileTransport(MailConfig.outbox_dir)
+    raise ValueError(f"Unknown MAIL_TRANSPORT '{MailConfig.transport}'")
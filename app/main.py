@@ -1,13 +1,26 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import MongoDBConnectionManager
-from app.config import FastAPIConfig, CorsConfig, ENV
+from app.database import close_client
+from app.delivery import stop_delivery
+from app.config import (
+    load_api_description,
+    FastAPIConfig,
+    CorsConfig,
+    LimiterConfig,
+    ProfilingConfig,
+    ENV,
+)
+from app.limiter import LoadSheddingMiddleware, limiter
+from app.profiling import ProfilingMiddleware
+from app.startup import begin_startup, cancel_startup, readiness, startup_state
+from app.telemetry import TracingMiddleware, start_telemetry, stop_telemetry
 
 from app.routers.tickets.endpoints import router as tickets_router
-from app.scheduler import start_scheduler, stop_scheduler
+from app.routers.admin.endpoints import router as admin_router
 
 
 @asynccontextmanager
@@ -15,21 +28,48 @@ async def lifespan(_: FastAPI):
     """
     Lifespan context for application startup and shutdown.
     """
-    # Check database connection on startup
-    async with MongoDBConnectionManager() as db:
-        pass
+    # Start log/trace writer threads
+    start_telemetry()
 
-    # Start scheduler
-    start_scheduler()
+    # Indexes, scheduler and delivery workers start in the background, so
+    # the app serves right away; `/ready` reports when it is fully up
+    begin_startup()
     yield
-    # Shutdown scheduler
-    stop_scheduler()
+    # Shutdown startup tasks, scheduler and delivery workers
+    await cancel_startup()
+    if startup_state["background"]:
+        from app.scheduler import stop_scheduler
+
+        stop_scheduler()
+    await stop_delivery()
+    close_client()
+    stop_telemetry()
 
 
 # Initialize FastAPI application
 app = FastAPI(**FastAPIConfig.dict(), lifespan=lifespan)
 
 
+def openapi() -> dict:
+    # The long markdown description is only read when the docs are requested
+    if app.openapi_schema is None:
+        app.description = load_api_description()
+    return FastAPI.openapi(app)
+
+
+app.openapi = openapi
+
+
+# Per-request profiling, only installed when configured
+if ProfilingConfig.enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+
+# Concurrency limits (inside CORS, so shed responses keep CORS headers)
+if LimiterConfig.enabled:
+    app.add_middleware(LoadSheddingMiddleware, limiter=limiter)
+
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -41,11 +81,26 @@ app.add_middleware(
 )
 
 
+# Tracing (outermost, so spans cover shed and CORS responses too)
+app.add_middleware(TracingMiddleware)
+
+
 # Healthcheck Endpoint
 @app.get("/", tags=["Healthcheck"])
 def healthcheck():
     return {"status": "ok", "name": app.title, "version": app.version, "env": ENV}
 
 
+# Readiness probe: database reachable and indexes in place
+@app.get("/ready", tags=["Healthcheck"])
+async def ready():
+    ok, checks = await readiness()
+    return JSONResponse(
+        {"status": "ready" if ok else "starting", "checks": checks},
+        status_code=200 if ok else 503,
+    )
+
+
 # Routers
 app.include_router(tickets_router)
+app.include_router(admin_router)
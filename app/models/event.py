@@ -1,13 +1,48 @@
 from datetime import datetime
-from pydantic import Field, BaseModel
+from pydantic import Field, BaseModel, model_validator
 
 from app.models.common import MongoBase
 
 
+class SeatRow(BaseModel):
+    name: str
+    seats: int = Field(..., gt=0, description="Seats numbered 1..seats")
+
+
+class SeatSection(BaseModel):
+    name: str
+    rows: list[SeatRow] = Field(..., min_length=1)
+
+
+class SeatMap(BaseModel):
+    """Numbered seats of a ticket type, sections and rows in preference order."""
+
+    sections: list[SeatSection] = Field(..., min_length=1)
+
+    @property
+    def capacity(self) -> int:
+        return sum(r.seats for s in self.sections for r in s.rows)
+
+
+class SeatRef(BaseModel):
+    section: str
+    row: str
+    seat: int = Field(..., ge=1)
+
+
 class TicketType(BaseModel):
     type: str
     price: float
     available: int
+    seat_map: SeatMap | None = None
+
+    @model_validator(mode="after")
+    def _check_capacity(self) -> "TicketType":
+        if self.seat_map and self.available > self.seat_map.capacity:
+            raise ValueError(
+                f"'{self.type}' has more tickets available than seats in its map"
+            )
+        return self
 
 
 class Event(MongoBase):
@@ -24,3 +59,42 @@ class PaginatedEvents(BaseModel):
     page: int
     limit: int
     total: int
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class EventFacets(BaseModel):
+    category: list[FacetCount]
+    month: list[FacetCount]
+    availability: list[FacetCount]
+    total: int
+
+
+class TicketTypeStats(BaseModel):
+    sold: int = 0
+    held: int = 0
+    expired: int = 0
+    revenue: float = 0.0
+
+
+class EventStats(MongoBase):
+    tickets: dict[str, TicketTypeStats] = Field(default_factory=dict)
+    updated_at: datetime | None = None
+
+
+class SeatRowAvailability(BaseModel):
+    section: str
+    row: str
+    seats: int
+    free: int
+    bitmap: str = Field(
+        ..., description="Base64, bit i (LSB first) set = seat i+1 free"
+    )
+
+
+class SeatAvailability(BaseModel):
+    type: str
+    rows: list[SeatRowAvailability]
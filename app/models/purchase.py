@@ -1,12 +1,83 @@
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, Field
+from collections.abc import Iterable, Iterator
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 from app.models.common import MongoBase
+from app.models.event import SeatRef
 
 
 class Ticket(BaseModel):
     code: str
     type: str
+    seat: SeatRef | None = None
+
+
+class TicketRange(BaseModel):
+    type: str
+    prefix: str = Field(..., description="Code prefix shared by the range")
+    start: int = Field(..., ge=0, description="First sequence number")
+    count: int = Field(..., gt=0, description="Number of tickets in the range")
+    seats: list[SeatRef] | None = Field(
+        None, description="Seat of each ticket in the range, in code order"
+    )
+
+    def codes(self) -> Iterator[str]:
+        for seq in range(self.start, self.start + self.count):
+            yield f"{self.prefix}{seq:04}"
+
+    def tickets(self) -> Iterator[Ticket]:
+        seats = self.seats or [None] * self.count
+        for code, seat in zip(self.codes(), seats):
+            # Codes are generated here, no need to validate them again
+            yield Ticket.model_construct(code=code, type=self.type, seat=seat)
+
+
+def compress_tickets(tickets: Iterable[Ticket]) -> list[TicketRange] | None:
+    """
+    Group a flat ticket list into contiguous code ranges per type.
+
+    Returns None if any code does not follow the ``<prefix>-<seq:04>`` format
+    used by checkout, since it could not be rebuilt from a range.
+    """
+    ranges: list[TicketRange] = []
+    for t in tickets:
+        prefix, sep, seq = t.code.rpartition("-")
+        if not sep or not seq.isdigit() or f"{int(seq):04}" != seq:
+            return None
+        prefix, seq = prefix + sep, int(seq)
+        last = ranges[-1] if ranges else None
+        if (
+            last
+            and last.type == t.type
+            and last.prefix == prefix
+            and last.start + last.count == seq
+        ):
+            last.count += 1
+        else:
+            ranges.append(TicketRange(type=t.type, prefix=prefix, start=seq, count=1))
+    return ranges
+
+
+def issue_ticket_ranges(
+    event_id: str, items: list[dict], start: int = 1
+) -> list[TicketRange]:
+    """One range of fresh codes per reservation item, numbered from `start`."""
+    prefix = f"T-{event_id[-3:]}-"
+    ranges: list[TicketRange] = []
+    seq = start
+    for it in items:
+        qty = int(it["quantity"])
+        ranges.append(
+            TicketRange(
+                type=it["type"],
+                prefix=prefix,
+                start=seq,
+                count=qty,
+                seats=it.get("seats"),
+            )
+        )
+        seq += qty
+    return ranges
 
 
 class BuyerInfo(BaseModel):
@@ -14,13 +85,45 @@ class BuyerInfo(BaseModel):
     email: EmailStr = Field(..., description="Valid email address of the buyer")
 
 
+class TicketDelivery(BaseModel):
+    status: str = Field(..., description="PENDING, SENT or FAILED")
+    emails_sent: int = 0
+    delivered_at: datetime | None = None
+
+
 class Purchase(MongoBase):
     reservation_id: str
     event_id: str
-    tickets: list[Ticket]
+    ticket_ranges: list[TicketRange] = Field(default_factory=list)
+    tickets: list[Ticket] | None = Field(
+        default=None, description="Expanded tickets, only when requested"
+    )
     buyer: BuyerInfo
     total_price: float
     confirmed_at: datetime
+    delivery: TicketDelivery | None = Field(
+        default=None, description="QR and email delivery of the tickets"
+    )
+
+    @model_validator(mode="after")
+    def _compress_legacy_tickets(self) -> "Purchase":
+        # Purchases stored before range encoding only carry `tickets`
+        if self.tickets and not self.ticket_ranges:
+            ranges = compress_tickets(self.tickets)
+            if ranges is not None:
+                self.ticket_ranges = ranges
+                self.tickets = None
+        return self
+
+    def iter_tickets(self) -> Iterator[Ticket]:
+        if self.tickets and not self.ticket_ranges:
+            yield from self.tickets
+            return
+        for r in self.ticket_ranges:
+            yield from r.tickets()
+
+    def expanded(self) -> "Purchase":
+        return self.model_copy(update={"tickets": list(self.iter_tickets())})
 
 
 class ReservationBuyerInput(BaseModel):
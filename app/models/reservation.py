@@ -2,16 +2,25 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 
 from app.models.common import MongoBase
+from app.models.event import SeatRef
 
 
 class ReservationItem(BaseModel):
     type: str
     quantity: int = Field(..., gt=0, description="Number of tickets to reserve")
+    seats: list[SeatRef] | None = Field(
+        None,
+        description="Specific seats on a seated type; omit for best contiguous seats",
+    )
+
+
+class ReservationLine(ReservationItem):
+    price: float | None = Field(None, description="Unit price when reserved")
 
 
 class Reservation(MongoBase):
     event_id: str
-    items: list[ReservationItem]
+    items: list[ReservationLine]
     total_price: float
     status: str = "PENDING"
     created_at: datetime
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, Field
+
+from app.config import ScanConfig
+
+ScanStatus = Literal["VALID", "ALREADY_USED", "INVALID", "CONFLICT"]
+
+
+class ScanInput(BaseModel):
+    code: str = Field(..., description="Ticket code read at the gate")
+    gate: str | None = Field(None, description="Gate or device identifier")
+
+
+class ScanRecord(ScanInput):
+    scanned_at: datetime = Field(..., description="When the device read the code")
+
+
+class ScanResult(BaseModel):
+    code: str
+    status: ScanStatus
+    offline: bool = Field(
+        False, description="Accepted while the database was unreachable"
+    )
+
+
+class ScanBatchInput(BaseModel):
+    scans: list[ScanRecord] = Field(..., min_length=1, max_length=ScanConfig.max_batch)
+
+
+class ScanBatchResponse(BaseModel):
+    results: list[ScanResult]
+    valid: int
+    already_used: int
+    invalid: int
+    conflict: int = 0
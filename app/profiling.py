@@ -0,0 +1,123 @@
+import io
+import re
+import time
+import random
+import asyncio
+import pstats
+import cProfile
+import secrets
+
+from pathlib import Path
+from typing import Any
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import ProfilingConfig
+
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_SUFFIX = ".pstats"
+
+_NAME = re.compile(r"^(\d+)_(\d+)ms_([A-Z]+)_([\w.-]*)\.pstats$")
+
+# cProfile hooks the whole thread, so at most one request runs under it
+profiling_stats = {"active": False, "profiled": 0, "skipped_busy": 0}
+
+
+def profile_dir() -> Path:
+    return Path(ProfilingConfig.directory)
+
+
+def _slug(path: str) -> str:
+    return re.sub(r"[^\w.-]+", "-", path.strip("/"))[:60] or "root"
+
+
+def list_profiles() -> list[dict[str, Any]]:
+    """Stored profiles, newest first, described from their file names."""
+    entries = []
+    for file in profile_dir().glob(f"*{PROFILE_SUFFIX}"):
+        match = _NAME.match(file.name)
+        if not match:
+            continue
+        started, duration, method, slug = match.groups()
+        entries.append(
+            {
+                "name": file.name,
+                "started_at": int(started) / 1000,
+                "duration_ms": int(duration),
+                "method": method,
+                "path_slug": slug,
+                "bytes": file.stat().st_size,
+            }
+        )
+    return sorted(entries, key=lambda e: e["started_at"], reverse=True)
+
+
+def profile_path(name: str) -> Path | None:
+    if not _NAME.match(name):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
+
+
+def profile_summary(path: Path, sort: str, limit: int) -> str:
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _write_profile(profiler: cProfile.Profile, name: str) -> None:
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / name)
+    # Bounded ring: drop the oldest profiles beyond PROFILE_KEEP
+    for entry in list_profiles()[ProfilingConfig.keep :]:
+        (directory / entry["name"]).unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Run `cProfile` around requests that ask for it with `X-Profile-Token`, or
+    a `PROFILE_SAMPLE_RATE` fraction of them, and store the stats on disk.
+
+    Only installed when profiling is configured, so it costs nothing otherwise.
+    A profile also holds whatever else the event loop ran during the request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    def _wanted(self, scope: Scope) -> bool:
+        # Reading profiles carries the token too; do not profile that
+        if scope["path"].startswith("/admin/profiles"):
+            return False
+        if ProfilingConfig.token:
+            for key, value in scope["headers"]:
+                if key == PROFILE_HEADER:
+                    return secrets.compare_digest(value, ProfilingConfig.token.encode())
+        return random.random() < ProfilingConfig.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        if profiling_stats["active"]:
+            profiling_stats["skipped_busy"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        profiling_stats["active"] = True
+        profiler = cProfile.Profile()
+        started = time.time()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.disable()
+            profiling_stats["active"] = False
+            profiling_stats["profiled"] += 1
+            duration = int((time.time() - started) * 1000)
+            name = (
+                f"{int(started * 1000)}_{duration}ms_{scope['method']}_"
+                f"{_slug(scope['path'])}{PROFILE_SUFFIX}"
+            )
+            # Marshalling and disk I/O stay off the event loop
+            await asyncio.to_thread(_write_profile, profiler, name)
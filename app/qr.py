@@ -0,0 +1,11 @@
+def render_qr_svgs(codes: list[str]) -> list[bytes]:
+    """
+    Render one SVG QR code per ticket code.
+
+    CPU-bound; meant to run in a process pool, so `qrcode` is only imported
+    by the worker processes.
+    """
+    import qrcode
+    from qrcode.image.svg import SvgPathImage
+
+    return [qrcode.make(code, image_factory=SvgPathImage).to_string() for code in codes]
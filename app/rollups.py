@@ -0,0 +1,179 @@
+from urllib.parse import unquote
+from datetime import datetime, timezone
+from collections.abc import Iterable
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.archive import archive_name
+from app.database import MongoDBConnectionManager
+
+
+def stat_key(ticket_type: str) -> str:
+    """
+    Field name of a ticket type in a rollup's `tickets`.
+
+    Ticket type names are free-form; `%`, `.` and `$` are percent-encoded so a
+    name is always one valid path segment (`"Sec. A"` → `"Sec%2E A"`). Names
+    without those characters are stored as is.
+    """
+    if not ticket_type:
+        return "%"
+    return ticket_type.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def ticket_type_of(key: str) -> str:
+    return "" if key == "%" else unquote(key)
+
+
+def decode_tickets(tickets: dict[str, dict]) -> dict[str, dict]:
+    return {ticket_type_of(k): v for k, v in tickets.items()}
+
+
+def _quantity(status: str):
+    return {"$cond": [{"$eq": ["$status", status]}, "$items.quantity", 0]}
+
+
+def rebuild_pipeline(event_id: str | None = None) -> list[dict]:
+    """
+    Aggregation recomputing rollups from reservations, hot and archived: one
+    row per event with its `tickets` as a list of per-type counters.
+
+    Confirmed reservations count as sold, pending as held and expired as
+    expired. Revenue uses the unit price stored on each item, falling back to a
+    quantity-weighted share of `total_price` for reservations made before
+    prices were stored per item.
+    """
+    match: dict = {"status": {"$in": ["PENDING", "CONFIRMED", "EXPIRED"]}}
+    if event_id:
+        match["event_id"] = event_id
+
+    return [
+        {"$match": match},
+        {
+            "$unionWith": {
+                "coll": archive_name("reservations"),
+                "pipeline": [{"$match": match}],
+            }
+        },
+        # An interrupted archive move leaves a settled reservation in both
+        # collections; the copies are identical, count it once
+        {"$group": {"_id": "$_id", "doc": {"$first": "$$ROOT"}}},
+        {"$replaceRoot": {"newRoot": "$doc"}},
+        {"$addFields": {"_quantity": {"$sum": "$items.quantity"}}},
+        {"$unwind": "$items"},
+        {
+            "$group": {
+                "_id": {"event_id": "$event_id", "type": "$items.type"},
+                "sold": {"$sum": _quantity("CONFIRMED")},
+                "held": {"$sum": _quantity("PENDING")},
+                "expired": {"$sum": _quantity("EXPIRED")},
+                "revenue": {
+                    "$sum": {
+                        "$cond": [
+                            {"$eq": ["$status", "CONFIRMED"]},
+                            {
+                                "$ifNull": [
+                                    {"$multiply": ["$items.price", "$items.quantity"]},
+                                    {
+                                        "$multiply": [
+                                            "$total_price",
+                                            {
+                                                "$divide": [
+                                                    "$items.quantity",
+                                                    "$_quantity",
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                ]
+                            },
+                            0,
+                        ]
+                    }
+                },
+            }
+        },
+        {
+            "$group": {
+                "_id": "$_id.event_id",
+                "tickets": {
+                    "$push": {
+                        "type": "$_id.type",
+                        "sold": "$sold",
+                        "held": "$held",
+                        "expired": "$expired",
+                        "revenue": "$revenue",
+                    }
+                },
+            }
+        },
+    ]
+
+
+async def inc_event_stats(
+    db: AsyncIOMotorDatabase, event_id: str, changes: dict[str, dict[str, float]]
+) -> None:
+    """
+    Apply `{type: {counter: delta}}` to an event rollup with a single `$inc`.
+    """
+    inc = {
+        f"tickets.{stat_key(ttype)}.{counter}": delta
+        for ttype, counters in changes.items()
+        for counter, delta in counters.items()
+        if delta
+    }
+    if not inc:
+        return
+    await db.event_stats.update_one(
+        {"_id": event_id},
+        {"$inc": inc, "$currentDate": {"updated_at": True}},
+        upsert=True,
+    )
+
+
+def item_changes(
+    items: Iterable[dict], counters: dict[str, int], total_price: float | None = None
+) -> dict[str, dict[str, float]]:
+    """
+    Build rollup deltas for reservation items.
+
+    `counters` maps counter names to the sign applied to each item quantity,
+    e.g. `{"held": -1, "sold": 1}`. When `total_price` is given, revenue is
+    added from the item unit prices.
+    """
+    items = list(items)
+    quantity = sum(int(it["quantity"]) for it in items) or 1
+    changes: dict[str, dict[str, float]] = {}
+    for it in items:
+        qty = int(it["quantity"])
+        per_type = changes.setdefault(it["type"], {})
+        for counter, sign in counters.items():
+            per_type[counter] = per_type.get(counter, 0) + sign * qty
+        if total_price is not None:
+            price = it.get("price")
+            revenue = price * qty if price is not None else total_price * qty / quantity
+            per_type["revenue"] = per_type.get("revenue", 0.0) + revenue
+    return changes
+
+
+async def rebuild_event_stats(event_id: str | None = None) -> int:
+    """
+    Recompute rollups from source collections, for one event or all of them.
+
+    Increments applied while a rebuild runs may be overwritten; run it during a
+    quiet period. Returns the number of rollup documents written.
+    """
+    async with MongoDBConnectionManager() as db:
+        await db.event_stats.delete_many({"_id": event_id} if event_id else {})
+        written = 0
+        # Keys are encoded here rather than with `$arrayToObject`, so they
+        # match the ones `inc_event_stats` writes
+        async for row in db.reservations.aggregate(rebuild_pipeline(event_id)):
+            tickets = {stat_key(t.pop("type")): t for t in row["tickets"]}
+            await db.event_stats.replace_one(
+                {"_id": row["_id"]},
+                {"tickets": tickets, "updated_at": datetime.now(timezone.utc)},
+                upsert=True,
+            )
+            written += 1
+        return written
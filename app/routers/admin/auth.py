@@ -0,0 +1,19 @@
+import secrets
+
+from fastapi import Header, HTTPException
+
+from app.config import ProfilingConfig
+
+
+def require_admin_token(x_profile_token: str | None = Header(None)) -> None:
+    """
+    Admin routes expose internals (counters, code paths, timings): they take
+    the same token that turns profiling on, and are closed without one.
+    """
+    token = ProfilingConfig.token
+    if not (
+        token
+        and x_profile_token
+        and secrets.compare_digest(x_profile_token.encode(), token.encode())
+    ):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
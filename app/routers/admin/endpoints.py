@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+
+from app.routers.admin.metrics import router as metrics_router
+from app.routers.admin.profiles import router as profiles_router
+
+router = APIRouter()
+
+router.include_router(metrics_router)
+router.include_router(profiles_router)
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends
+
+from app.cache import cache_stats
+from app.database import MongoDBConnectionManager
+from app.delivery import delivery_stats
+from app.gate import gate_stats
+from app.limiter import limiter
+from app.singleflight import singleflight_stats
+from app.telemetry import telemetry_stats
+from app.scheduler.jobs import archive_stats
+from app.routers.admin.auth import require_admin_token
+
+router = APIRouter(
+    prefix="/admin/metrics",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin_token)],
+)
+
+
+@router.get("/singleflight")
+async def get_singleflight_metrics():
+    """
+    ## 📈 Coalescencia de lecturas
+
+    Contadores por grupo de lecturas concurrentes que se comparten una sola
+    llamada a la base de datos.
+
+    - `calls`: llamadas ejecutadas realmente.
+    - `coalesced`: solicitudes que reutilizaron una llamada en curso.
+    - `inflight`: llamadas en curso en este momento.
+    """
+    return singleflight_stats()
+
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """
+    ## 🗃️ Cachés en memoria
+
+    Tamaño, aciertos, fallos e invalidaciones de cada caché del proceso.
+    """
+    return cache_stats()
+
+
+@router.get("/archive")
+async def get_archive_metrics():
+    """
+    ## 🧊 Archivo de datos fríos
+
+    Resultado de la última ejecución del archivador: tamaño estimado de cada
+    colección activa antes y después, y documentos movidos al archivo.
+    """
+    return archive_stats
+
+
+@router.get("/limiter")
+async def get_limiter_metrics():
+    """
+    ## 🚦 Límites de concurrencia
+
+    Solicitudes en curso y en cola por grupo de rutas (`checkout`, `default`,
+    `browse`), y cuántas fueron rechazadas con `503` por cola llena
+    (`shed_queue_full`) o por esperar demasiado (`shed_timeout`).
+    """
+    return limiter.stats()
+
+
+@router.get("/telemetry")
+async def get_telemetry_metrics():
+    """
+    ## 📝 Logs y trazas
+
+    Registros de log y spans de traza en cola a la espera de escribirse, y
+    cuántos se descartaron por tener la cola llena (el log nunca bloquea una
+    solicitud).
+    """
+    return telemetry_stats()
+
+
+@router.get("/delivery")
+async def get_delivery_metrics():
+    """
+    ## ✉️ Envío de tickets
+
+    Estado de la cola de envío de QR y correos posterior al checkout.
+
+    - `pending` / `failed`: compras por enviar y compras que agotaron sus
+      reintentos.
+    - `workers`: cola en memoria, envíos en curso, reintentos, correos y
+      tickets enviados, tiempo total de render y envío, y
+      `tickets_per_second` en el último minuto.
+    """
+    async with MongoDBConnectionManager() as db:
+        return await delivery_stats(db)
+
+
+@router.get("/gate")
+async def get_gate_metrics():
+    """
+    ## 🚪 Validación en puertas
+
+    Códigos emitidos y usados por evento en el índice en memoria, y escaneos
+    aceptados sin conexión que aún esperan registrarse.
+    """
+    return gate_stats()
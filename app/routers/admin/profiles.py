@@ -0,0 +1,94 @@
+import asyncio
+
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from app.config import ProfilingConfig
+from app.routers.admin.auth import require_admin_token
+from app.profiling import (
+    list_profiles,
+    profile_path,
+    profile_summary,
+    profiling_stats,
+)
+
+router = APIRouter(
+    prefix="/admin/profiles",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin_token)],
+)
+
+
+@router.get("")
+async def get_profiles():
+    """
+    ## 🔬 Perfiles de solicitudes
+
+    Lista los perfiles guardados, del más reciente al más antiguo.
+
+    Se perfila una solicitud cuando trae el encabezado
+    `X-Profile-Token: <PROFILE_TOKEN>`, o al azar con probabilidad
+    `PROFILE_SAMPLE_RATE`. Se guardan como máximo `PROFILE_KEEP` perfiles en
+    `PROFILE_DIR`. Si ninguna de las dos opciones está configurada el perfilado
+    queda desactivado y no agrega costo a las solicitudes.
+
+    Requiere el mismo encabezado `X-Profile-Token`; sin `PROFILE_TOKEN`
+    configurado los perfiles no se pueden consultar.
+
+    **Ejemplo de respuesta**
+    ```json
+    {
+      "enabled": true,
+      "active": false,
+      "profiled": 3,
+      "skipped_busy": 0,
+      "profiles": [
+        {
+          "name": "1761064765921_184ms_POST_checkout.pstats",
+          "started_at": 1761064765.921,
+          "duration_ms": 184,
+          "method": "POST",
+          "path_slug": "checkout",
+          "bytes": 48213
+        }
+      ]
+    }
+    ```
+
+    **Errores**
+    - `403 Invalid profile token`
+    """
+    profiles = await asyncio.to_thread(list_profiles)
+    return {"enabled": ProfilingConfig.enabled, **profiling_stats, "profiles": profiles}
+
+
+@router.get("/{name}")
+async def get_profile(
+    name: str,
+    format: Literal["pstats", "text"] = Query("pstats"),
+    sort: Literal["cumulative", "tottime", "calls"] = Query("cumulative"),
+    limit: int = Query(40, ge=1, le=500),
+):
+    """
+    ## 📄 Descargar perfil
+
+    - `format=pstats` (por defecto): archivo binario para `python -m pstats` o
+      visores como [snakeviz][snakeviz].
+    - `format=text`: las `limit` funciones más costosas según `sort`.
+
+    Requiere el encabezado `X-Profile-Token`.
+
+    **Errores**
+    - `403 Invalid profile token`
+    - `404 Profile not found`
+
+    [snakeviz]: https://jiffyclub.github.io/snakeviz/
+    """
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "text":
+        summary = await asyncio.to_thread(profile_summary, path, sort, limit)
+        return PlainTextResponse(summary)
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
@@ -1,12 +1,38 @@
+import base64
+
+from bson import ObjectId
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query, Body
 
+from app.archive import find_one_with_archive
+from app.cache import TTLCache
+from app.config import CacheConfig
 from app.database import MongoDBConnectionManager
-from app.models.event import Event, PaginatedEvents
+from app.rollups import decode_tickets
+from app.singleflight import SingleFlight
+from app.models.event import (
+    Event,
+    EventFacets,
+    EventStats,
+    FacetCount,
+    PaginatedEvents,
+    SeatAvailability,
+    SeatMap,
+    SeatRowAvailability,
+)
+from app.seating import SeatLayout, row_from_bytes, row_to_bytes, seat_map_id
 from app.models.common import to_oid, parse_mongo, PatchResponse
 
 router = APIRouter(tags=["Events"])
 
+# Identical concurrent reads share one database call and one parsed result
+events_flight = SingleFlight("events")
+
+# Facet counts per (q, category); cleared on every event write
+facets_cache = TTLCache("event_facets", ttl=CacheConfig.facets_ttl)
+
+LOW_AVAILABILITY = 20  # Upper bound (inclusive) of the "low" stock bucket
+
 
 @router.get("/events", response_model=PaginatedEvents)
 async def list_events(
@@ -52,13 +78,17 @@ async def list_events(
     }
     ```
     """
-    async with MongoDBConnectionManager() as db:
-        query: dict = {}
-        if q:
-            query["name"] = {"$regex": q, "$options": "i"}
-        if category:
-            query["category"] = category
+    key = ("list", q, category, sort, limit, page)
+    return await events_flight.do(
+        key, lambda: _fetch_events(q, category, sort, limit, page)
+    )
+
 
+async def _fetch_events(
+    q: str | None, category: str | None, sort: str | None, limit: int, page: int
+) -> PaginatedEvents:
+    async with MongoDBConnectionManager("browse") as db:
+        query = _events_query(q, category)
         cursor = db.events.find(query)
         if sort:
             field = sort.lstrip("-")
@@ -69,7 +99,113 @@ async def list_events(
         skip = (page - 1) * limit
 
         docs = [Event(**doc) async for doc in cursor.skip(skip).limit(limit)]
-        return {"data": docs, "page": page, "limit": limit, "total": total}
+        return PaginatedEvents(data=docs, page=page, limit=limit, total=total)
+
+
+def _events_query(q: str | None, category: str | None) -> dict:
+    query: dict = {}
+    if q:
+        query["name"] = {"$regex": q, "$options": "i"}
+    if category:
+        query["category"] = category
+    return query
+
+
+@router.get("/events/facets", response_model=EventFacets)
+async def get_event_facets(q: str | None = None, category: str | None = None):
+    """
+    ## 🧮 Facetas del catálogo
+
+    Devuelve conteos de eventos por categoría, por mes y por disponibilidad
+    para los mismos filtros `q` y `category` de `GET /events`.
+
+    Los buckets de disponibilidad suman el stock de todos los tipos de ticket:
+    `sold_out` (0), `low` (hasta 20) y `available` (más de 20). Los conteos se
+    guardan en caché unos segundos, por lo que el stock puede ir levemente
+    desfasado.
+
+    **Ejemplo de respuesta**
+    ```json
+    {
+      "category": [{"value": "music", "count": 12}, {"value": "theater", "count": 4}],
+      "month": [{"value": "2025-11", "count": 7}, {"value": "2025-12", "count": 9}],
+      "availability": [
+        {"value": "sold_out", "count": 2},
+        {"value": "low", "count": 3},
+        {"value": "available", "count": 11}
+      ],
+      "total": 16
+    }
+    ```
+    """
+    key = (q, category)
+    facets = facets_cache.get(key)
+    if facets is None:
+        generation, facets = await events_flight.do(
+            ("facets",) + key, lambda: _fetch_facets(q, category)
+        )
+        facets_cache.set(key, facets, generation)
+    return facets
+
+
+async def _fetch_facets(q: str | None, category: str | None) -> tuple[int, EventFacets]:
+    """
+    Run the facet aggregation; returns it with the cache generation read when
+    the query started, so a caller joining this flight after an invalidation
+    cannot cache a pre-write result.
+    """
+    generation = facets_cache.generation
+    pipeline = [
+        {"$match": _events_query(q, category)},
+        {
+            "$facet": {
+                "category": [
+                    {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                ],
+                "month": [
+                    {
+                        "$group": {
+                            "_id": {
+                                "$dateToString": {"format": "%Y-%m", "date": "$date"}
+                            },
+                            "count": {"$sum": 1},
+                        }
+                    },
+                    {"$sort": {"_id": 1}},
+                ],
+                "availability": [
+                    {"$project": {"available": {"$sum": "$tickets.available"}}},
+                    {
+                        "$bucket": {
+                            "groupBy": "$available",
+                            "boundaries": [0, 1, LOW_AVAILABILITY + 1],
+                            "default": "available",
+                        }
+                    },
+                ],
+                "total": [{"$count": "count"}],
+            }
+        },
+    ]
+    async with MongoDBConnectionManager("browse") as db:
+        [result] = await db.events.aggregate(pipeline).to_list(length=1)
+
+    buckets = {0: "sold_out", 1: "low", "available": "available"}
+    return generation, EventFacets(
+        category=[
+            FacetCount(value=str(f["_id"]), count=f["count"])
+            for f in result["category"]
+        ],
+        month=[
+            FacetCount(value=str(f["_id"]), count=f["count"]) for f in result["month"]
+        ],
+        availability=[
+            FacetCount(value=buckets[f["_id"]], count=f["count"])
+            for f in result["availability"]
+        ],
+        total=result["total"][0]["count"] if result["total"] else 0,
+    )
 
 
 @router.post("/events", response_model=Event, status_code=201)
@@ -105,6 +241,7 @@ async def create_event(event: Event = Body(...)):
 
     async with MongoDBConnectionManager() as db:
         res = await db.events.insert_one(payload)
+        facets_cache.clear()
         created = await db.events.find_one({"_id": res.inserted_id})
         return parse_mongo(created, Event)
 
@@ -115,18 +252,114 @@ async def get_event(event_id: str):
     ## 🔎 Obtener evento
 
     Retorna los datos completos de un evento a partir de su `event_id`
-    (de tipo [ObjectId][oid]).
+    (de tipo [ObjectId][oid]). Los eventos pasados se buscan en el archivo.
 
     **Errores**
     - `404` → Evento no encontrado
 
     [oid]: https://www.mongodb.com/docs/manual/reference/bson-types/#objectid
     """
-    async with MongoDBConnectionManager() as db:
-        doc = await db.events.find_one({"_id": to_oid(event_id)})
+    oid = to_oid(event_id)
+    return await events_flight.do(("get", oid), lambda: _fetch_event(oid))
+
+
+async def _fetch_event(oid: ObjectId) -> Event:
+    async with MongoDBConnectionManager("browse") as db:
+        doc = await find_one_with_archive(db, "events", {"_id": oid})
         return parse_mongo(doc, Event)
 
 
+@router.get("/events/{event_id}/stats", response_model=EventStats)
+async def get_event_stats(event_id: str):
+    """
+    ## 📊 Estadísticas de venta
+
+    Devuelve el resumen de ventas del evento por tipo de ticket, mantenido
+    incrementalmente en cada reserva, checkout y expiración.
+
+    - `sold`: tickets vendidos (reservas confirmadas).
+    - `held`: tickets retenidos por reservas `PENDING`.
+    - `expired`: tickets de reservas que expiraron.
+    - `revenue`: recaudación de los tickets vendidos.
+
+    **Ejemplo de respuesta**
+    ```json
+    {
+      "_id": "68f7b9d771fbcc686dd144e8",
+      "tickets": {
+        "General": {"sold": 40, "held": 4, "expired": 6, "revenue": 1000000.0},
+        "VIP": {"sold": 5, "held": 0, "expired": 1, "revenue": 300000.0}
+      },
+      "updated_at": "2025-10-21T16:39:40.123Z"
+    }
+    ```
+
+    **Errores**
+    - `404` → Evento no encontrado
+    """
+    oid = to_oid(event_id)
+    async with MongoDBConnectionManager("browse") as db:
+        doc = await db.event_stats.find_one({"_id": event_id})
+        if doc:
+            doc["tickets"] = decode_tickets(doc.get("tickets", {}))
+            return EventStats(**doc)
+        if not await find_one_with_archive(db, "events", {"_id": oid}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Event not found")
+        return EventStats(id=event_id)
+
+
+@router.get("/events/{event_id}/seats/{ticket_type}", response_model=SeatAvailability)
+async def get_seat_availability(event_id: str, ticket_type: str):
+    """
+    ## 💺 Disponibilidad de asientos
+
+    Devuelve, para un tipo de ticket con `seat_map`, los asientos libres de cada
+    fila como un bitmap compacto en base64: el bit `i` (desde el bit menos
+    significativo del primer byte) en `1` indica que el asiento `i + 1` está
+    libre.
+
+    **Errores**
+    - `404` → Evento, tipo de ticket o mapa de asientos no encontrado
+    """
+    oid = to_oid(event_id)
+    async with MongoDBConnectionManager("browse") as db:
+        doc = await db.seat_maps.find_one({"_id": seat_map_id(str(oid), ticket_type)})
+        if doc:
+            seat_map = SeatMap(**doc["seat_map"])
+            rows = [[row_from_bytes(b) for b in section] for section in doc["rows"]]
+        else:
+            event = await find_one_with_archive(
+                db, "events", {"_id": oid}, {"tickets.type": 1, "tickets.seat_map": 1}
+            )
+            ticket = next(
+                (
+                    t
+                    for t in (event or {}).get("tickets", [])
+                    if t["type"] == ticket_type
+                ),
+                None,
+            )
+            if not ticket or not ticket.get("seat_map"):
+                raise HTTPException(status_code=404, detail="Seat map not found")
+            seat_map = SeatMap(**ticket["seat_map"])
+            rows = SeatLayout(seat_map).full_rows()
+
+    return SeatAvailability(
+        type=ticket_type,
+        rows=[
+            SeatRowAvailability(
+                section=section.name,
+                row=row.name,
+                seats=row.seats,
+                free=free.bit_count(),
+                bitmap=base64.b64encode(row_to_bytes(free, row.seats)).decode(),
+            )
+            for section, section_rows in zip(seat_map.sections, rows)
+            for row, free in zip(section.rows, section_rows)
+        ],
+    )
+
+
 @router.patch("/events/{event_id}", response_model=PatchResponse)
 async def update_event(event_id: str, updates: dict = Body(...)):
     """
@@ -152,6 +385,7 @@ async def update_event(event_id: str, updates: dict = Body(...)):
 
     async with MongoDBConnectionManager() as db:
         res = await db.events.update_one({"_id": to_oid(event_id)}, {"$set": updates})
+        facets_cache.clear()
         if res.matched_count == 0:
             raise HTTPException(status_code=404, detail="Event not found")
         return {"updated": True}
@@ -170,6 +404,7 @@ async def delete_event(event_id: str):
     """
     async with MongoDBConnectionManager() as db:
         res = await db.events.delete_one({"_id": to_oid(event_id)})
+        facets_cache.clear()
         if res.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Event not found")
         return None
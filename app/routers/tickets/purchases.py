@@ -1,20 +1,64 @@
+import json
+import logging
+
+from bson import ObjectId
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 
 from app.database import MongoDBConnectionManager
-from app.models.purchase import Purchase, ReservationBuyerInput, BuyerInfo
+from app.delivery import new_delivery, notify_delivery
+from app.issuing import seed_ticket_counter
+from app.rollups import inc_event_stats, item_changes
+from app.telemetry import span
+from app.models.purchase import (
+    Purchase,
+    ReservationBuyerInput,
+    BuyerInfo,
+    TicketRange,
+    issue_ticket_ranges,
+)
 from app.models.common import to_oid, parse_mongo
 
 router = APIRouter(tags=["Purchases"])
 
+STREAM_CHUNK_SIZE = 500  # Tickets per streamed chunk
+
+logger = logging.getLogger("app.purchases")
+
+
+async def _take_ticket_numbers(
+    db: AsyncIOMotorDatabase, event_oid: ObjectId, quantity: int
+) -> dict | None:
+    """Reserve `quantity` numbers; None if the event or its counter is missing."""
+    return await db.events.find_one_and_update(
+        {"_id": event_oid, "tickets_issued": {"$exists": True}},
+        {"$inc": {"tickets_issued": quantity}},
+        projection={"tickets_issued": 1},
+        return_document=ReturnDocument.AFTER,
+    )
 
-@router.post("/checkout", response_model=Purchase, status_code=201)
+
+@router.post(
+    "/checkout",
+    response_model=Purchase,
+    response_model_exclude_none=True,
+    status_code=201,
+)
 async def checkout(payload: ReservationBuyerInput = Body(...)):
     """
     ## 💳 Checkout
 
     Confirma una reserva pendiente (`PENDING`) y genera una **compra** (`Purchase`)
-    con tickets emitidos.
+    con tickets emitidos. Los tickets se devuelven como rangos contiguos de
+    códigos por tipo (`ticket_ranges`): el rango del ejemplo equivale a
+    `T-4e8-0001` y `T-4e8-0002`.
+
+    Los códigos QR y el correo con los tickets se envían en segundo plano;
+    `delivery.status` pasa de `PENDING` a `SENT` (o `FAILED` tras agotar los
+    reintentos) y se puede consultar en `GET /purchases/{id}`.
 
     **Ejemplo de solicitud**
     ```json
@@ -30,13 +74,13 @@ async def checkout(payload: ReservationBuyerInput = Body(...)):
       "_id": "68f7bb32b3d1304d0e014071",
       "reservation_id": "68f7bb32b3d1304d0e014070",
       "event_id": "68f7b9d771fbcc686dd144e8",
-      "tickets": [
-        {"code": "T-4e8-0001", "type": "General"},
-        {"code": "T-4e8-0002", "type": "General"}
+      "ticket_ranges": [
+        {"type": "General", "prefix": "T-4e8-", "start": 1, "count": 2}
       ],
       "buyer": {"name": "Cliente Demo", "email": "demo@example.com"},
       "total_price": 50000.0,
-      "confirmed_at": "2025-10-21T16:39:40.123Z"
+      "confirmed_at": "2025-10-21T16:39:40.123Z",
+      "delivery": {"status": "PENDING", "emails_sent": 0}
     }
     ```
 
@@ -44,65 +88,129 @@ async def checkout(payload: ReservationBuyerInput = Body(...)):
     - `400 Invalid checkout request` → datos incompletos.
     - `400 Reservation is not active` → reserva expirada o ya confirmada.
     - `404 Reservation not found`.
+    - `404 Event not found`.
     """
     res_id = payload.reservation_id
     buyer = payload.buyer.model_dump()
     if not res_id or not buyer.get("email"):
         raise HTTPException(status_code=400, detail="Invalid checkout request")
 
+    now = datetime.now(timezone.utc)
     async with MongoDBConnectionManager() as db:
-        reservation = await db.reservations.find_one({"_id": to_oid(res_id)})
+        with span("mongo.reservations.find_one"):
+            reservation = await db.reservations.find_one({"_id": to_oid(res_id)})
         if not reservation:
             raise HTTPException(status_code=404, detail="Reservation not found")
-        if reservation["status"] != "PENDING":
+        # Past `expires_at` a reservation is reported EXPIRED before the
+        # expiry engine writes it, so it must not be confirmable either
+        expires_at = reservation["expires_at"].replace(tzinfo=timezone.utc)
+        if reservation["status"] != "PENDING" or expires_at <= now:
             raise HTTPException(status_code=400, detail="Reservation is not active")
 
-        await db.reservations.update_one(
-            {"_id": reservation["_id"]}, {"$set": {"status": "CONFIRMED"}}
-        )
+        with span("mongo.reservations.update_one"):
+            res = await db.reservations.update_one(
+                {
+                    "_id": reservation["_id"],
+                    "status": "PENDING",
+                    "expires_at": {"$gt": now},
+                },
+                {"$set": {"status": "CONFIRMED"}},
+            )
+        if res.modified_count == 0:
+            raise HTTPException(status_code=400, detail="Reservation is not active")
+
+        # Ticket numbers come from a per-event counter, so codes never repeat
+        # within an event; numbers of a checkout that fails below are skipped
+        quantity = sum(int(it["quantity"]) for it in reservation["items"])
+        event_oid = to_oid(str(reservation["event_id"]))
+        with span("mongo.events.find_one_and_update"):
+            event = await _take_ticket_numbers(db, event_oid, quantity)
+            if not event:
+                # Counter not seeded yet: continue after the codes already sold
+                await seed_ticket_counter(db, event_oid)
+                event = await _take_ticket_numbers(db, event_oid, quantity)
+        if not event:
+            await db.reservations.update_one(
+                {"_id": reservation["_id"], "status": "CONFIRMED"},
+                {"$set": {"status": "PENDING"}},
+            )
+            raise HTTPException(status_code=404, detail="Event not found")
+
+        with span("tickets.generate") as attrs:
+            ranges = issue_ticket_ranges(
+                str(reservation["event_id"]),
+                reservation["items"],
+                start=event["tickets_issued"] - quantity + 1,
+            )
+            attrs["tickets"] = sum(r.count for r in ranges)
+
+        with span("pydantic.purchase"):
+            purchase_doc = Purchase(
+                reservation_id=str(reservation["_id"]),
+                event_id=str(reservation["event_id"]),
+                ticket_ranges=ranges,
+                buyer=BuyerInfo(**buyer),
+                total_price=float(reservation["total_price"]),
+                confirmed_at=now,
+            ).model_dump(by_alias=True, exclude={"id", "tickets", "delivery"})
+        # QR codes and the email go out from the delivery outbox, in the
+        # background; the entry is part of the purchase, so it is never lost
+        purchase_doc["delivery"] = new_delivery(now)
 
-        tlist = []
-        seq = 1
-        for it in reservation["items"]:
-            qty = int(it["quantity"])
-            for _ in range(qty):
-                tlist.append(
-                    {
-                        "code": f"T-{str(reservation['event_id'])[-3:]}-{seq:04}",
-                        "type": it["type"],
-                    }
-                )
-                seq += 1
-
-        purchase_doc = Purchase(
-            reservation_id=str(reservation["_id"]),
-            event_id=str(reservation["event_id"]),
-            tickets=tlist,
-            buyer=BuyerInfo(**buyer),
-            total_price=float(reservation["total_price"]),
-            confirmed_at=datetime.now(timezone.utc),
-        ).model_dump(by_alias=True, exclude={"id"})
-
-        res = await db.purchases.insert_one(purchase_doc)
-        created = await db.purchases.find_one({"_id": res.inserted_id})
+        with span("mongo.purchases.insert_one"):
+            res = await db.purchases.insert_one(purchase_doc)
+        notify_delivery()
+        # Rollups only after the purchase exists: they can be rebuilt, a
+        # confirmed reservation without its purchase cannot
+        with span("mongo.event_stats.update_one"):
+            await inc_event_stats(
+                db,
+                str(reservation["event_id"]),
+                item_changes(
+                    reservation["items"],
+                    {"held": -1, "sold": 1},
+                    total_price=float(reservation["total_price"]),
+                ),
+            )
+        with span("mongo.purchases.find_one"):
+            created = await db.purchases.find_one({"_id": res.inserted_id})
+        logger.info(
+            "purchase confirmed",
+            extra={
+                "purchase_id": str(res.inserted_id),
+                "reservation_id": purchase_doc["reservation_id"],
+                "tickets": sum(r.count for r in ranges),
+            },
+        )
         return parse_mongo(created, Purchase)
 
 
-@router.get("/purchases/{purchase_id}", response_model=Purchase)
-async def get_purchase(purchase_id: str):
+@router.get(
+    "/purchases/{purchase_id}",
+    response_model=Purchase,
+    response_model_exclude_none=True,
+)
+async def get_purchase(
+    purchase_id: str,
+    expand: bool = Query(False, description="Incluir la lista completa de tickets"),
+):
     """
     ## 🧾 Obtener compra
 
     Devuelve la información completa de una compra, incluyendo el comprador
-    y los tickets generados.
+    y los tickets generados como rangos de códigos (`ticket_ranges`).
+
+    **Parámetros de consulta**
+    - `expand`: si es `true`, agrega `tickets` con un objeto por ticket. Para
+      compras grandes conviene usar `GET /purchases/{id}/tickets`.
 
     **Ejemplo de respuesta**
     ```json
     {
       "_id": "68f7bb32b3d1304d0e014071",
       "event_id": "68f7b9d771fbcc686dd144e8",
-      "tickets": [
-        {"code": "T-4e8-0001", "type": "General"}
+      "ticket_ranges": [
+        {"type": "General", "prefix": "T-4e8-", "start": 1, "count": 1}
       ],
       "buyer": {"name": "Cliente Demo", "email": "demo@example.com"},
       "total_price": 50000.0,
@@ -113,6 +221,56 @@ async def get_purchase(purchase_id: str):
     **Errores**
     - `404 Purchase not found`
     """
-    async with MongoDBConnectionManager() as db:
+    async with MongoDBConnectionManager("browse") as db:
         doc = await db.purchases.find_one({"_id": to_oid(purchase_id)})
-        return parse_mongo(doc, Purchase)
+        purchase = parse_mongo(doc, Purchase)
+        return purchase.expanded() if expand else purchase
+
+
+@router.get("/purchases/{purchase_id}/tickets")
+async def stream_purchase_tickets(purchase_id: str):
+    """
+    ## 🎫 Tickets de una compra (streaming)
+
+    Expande los rangos de la compra y transmite un ticket por línea en formato
+    [NDJSON][ndjson], sin construir la lista completa en memoria.
+
+    **Ejemplo de respuesta**
+    ```
+    {"code": "T-4e8-0001", "type": "General"}
+    {"code": "T-4e8-0002", "type": "General"}
+    ```
+
+    **Errores**
+    - `404 Purchase not found`
+
+    [ndjson]: https://github.com/ndjson/ndjson-spec
+    """
+    async with MongoDBConnectionManager("browse") as db:
+        doc = await db.purchases.find_one(
+            {"_id": to_oid(purchase_id)}, {"ticket_ranges": 1, "tickets": 1}
+        )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Purchase not found")
+
+    def lines():
+        if doc.get("ticket_ranges"):
+            tickets = (
+                t.model_dump(exclude_none=True)
+                for r in doc["ticket_ranges"]
+                for t in TicketRange(**r).tickets()
+            )
+        else:
+            tickets = (
+                {"code": t["code"], "type": t["type"]} for t in doc.get("tickets") or []
+            )
+        chunk = []
+        for ticket in tickets:
+            chunk.append(json.dumps(ticket))
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,16 +1,38 @@
+import asyncio
+import logging
+
+from bson import ObjectId
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.archive import find_one_with_archive
+from app.config import ExpiryConfig
 from app.database import MongoDBConnectionManager
+from app.models.event import SeatMap
+from app.seating import allocate_seats, release_seats
+from app.rollups import inc_event_stats, item_changes
+from app.singleflight import SingleFlight
+from app.telemetry import span
+from app.scheduler.jobs import enqueue_expired_reservation, return_reservation_items
 from app.models.common import to_oid, parse_mongo
 from app.models.reservation import (
     Reservation,
+    ReservationItem,
+    ReservationLine,
     ReservationCreateResponse,
     ReservationCreateInput,
 )
 
 router = APIRouter(tags=["Reservations"])
 
+stock_flight = SingleFlight("reservation_stock")
+
+logger = logging.getLogger("app.reservations")
+
+SETTLED_MAX_AGE = 60  # Seconds a CONFIRMED/EXPIRED status may be cached
+
 
 @router.post("/reservations", response_model=ReservationCreateResponse, status_code=201)
 async def create_reservation(payload: ReservationCreateInput = Body(...)):
@@ -40,10 +62,20 @@ async def create_reservation(payload: ReservationCreateInput = Body(...)):
     }
     ```
 
+    **Asientos numerados**
+
+    Si el tipo de ticket tiene `seat_map`, cada ítem puede indicar `seats`
+    (`[{"section": "A", "row": "1", "seat": 12}, ...]`, tantos como
+    `quantity`). Sin `seats` se asignan los mejores `quantity` asientos
+    contiguos: la primera fila del mapa que los tenga, lo más al centro
+    posible. Los asientos asignados vuelven en `GET /reservations/{id}` y se
+    liberan si la reserva expira.
+
     **Errores frecuentes**
     - `400 Invalid ObjectId` → IDs deben ser [ObjectId][oid] válidos.
     - `400 Not enough 'TYPE' tickets` → stock insuficiente.
     - `404 Event not found` → evento no existe.
+    - `409` → asientos ocupados o sin bloque contiguo disponible.
 
     [oid]: https://www.mongodb.com/docs/manual/reference/bson-types/#objectid
     """
@@ -52,51 +84,83 @@ async def create_reservation(payload: ReservationCreateInput = Body(...)):
     if not event_id or not items:
         raise HTTPException(status_code=400, detail="Invalid request")
 
+    event_oid = to_oid(event_id)
     async with MongoDBConnectionManager() as db:
-        event = await db.events.find_one({"_id": to_oid(event_id)})
+        # Shared, read-only snapshot: concurrent reservations for the same event
+        # coalesce into one lookup; the conditional $inc below is authoritative.
+        with span("mongo.events.find_one"):
+            event = await stock_flight.do(event_oid, lambda: _fetch_stock(event_oid))
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
 
         tickets = event.get("tickets", [])
         type_index = {t["type"]: i for i, t in enumerate(tickets)}
-        total = 0.0
-
-        for i in items:
-            it = i.model_dump()
-            ttype = it["type"]
-            qty = int(it["quantity"])
-            if ttype not in type_index:
-                raise HTTPException(
-                    status_code=400, detail=f"Unknown ticket type '{ttype}'"
-                )
-            t = tickets[type_index[ttype]]
-            if t["available"] < qty:
-                raise HTTPException(
-                    status_code=400, detail=f"Not enough '{ttype}' tickets"
-                )
-            total += float(t["price"]) * qty
+        lines, requested, total = price_items(tickets, items)
 
-        for i in items:
-            it = i.model_dump()
-            idx = type_index[it["type"]]
-            tickets[idx]["available"] -= int(it["quantity"])
+        # Numbered seats and stock are taken first and given back if anything
+        # else fails, cancellation included
+        reservation_oid = ObjectId()
+        seated: list[ReservationLine] = []
+        stock_taken = False
+        try:
+            for line in lines:
+                seat_map = tickets[type_index[line.type]].get("seat_map")
+                if seat_map:
+                    with span("seats.allocate", type=line.type, qty=line.quantity):
+                        line.seats = await allocate_seats(
+                            db,
+                            str(event_oid),
+                            line.type,
+                            SeatMap(**seat_map),
+                            line.quantity,
+                            line.seats,
+                        )
+                    seated.append(line)
+            with span("mongo.events.update_one"):
+                await _take_stock(db, event_oid, requested)
+            stock_taken = True
 
-        await db.events.update_one(
-            {"_id": event["_id"]}, {"$set": {"tickets": tickets}}
-        )
+            with span("pydantic.reservation"):
+                reservation_doc = Reservation(
+                    event_id=str(event["_id"]),
+                    items=lines,
+                    total_price=total,
+                    status="PENDING",
+                    created_at=datetime.now(timezone.utc),
+                    expires_at=datetime.now(timezone.utc) + timedelta(minutes=2),
+                ).model_dump(by_alias=True, exclude={"id"})
+            reservation_doc["_id"] = reservation_oid
 
-        reservation_doc = Reservation(
-            event_id=str(event["_id"]),
-            items=items,
-            total_price=total,
-            status="PENDING",
-            created_at=datetime.now(timezone.utc),
-            expires_at=datetime.now(timezone.utc) + timedelta(minutes=2),
-        ).model_dump(by_alias=True, exclude={"id"})
+            with span("mongo.reservations.insert_one"):
+                res = await db.reservations.insert_one(reservation_doc)
+        except BaseException:
+            # Shielded: a second cancellation must not leave the hold behind
+            await asyncio.shield(
+                _give_back(
+                    db,
+                    event_oid,
+                    reservation_oid,
+                    seated,
+                    requested if stock_taken else None,
+                )
+            )
+            raise
 
-        res = await db.reservations.insert_one(reservation_doc)
         reservation_id = str(res.inserted_id)
-        print("DEBUG reservation_id:", reservation_id)  # opcional
+        with span("mongo.event_stats.update_one"):
+            await inc_event_stats(
+                db,
+                reservation_doc["event_id"],
+                item_changes(reservation_doc["items"], {"held": 1}),
+            )
+        logger.info(
+            "reservation created",
+            extra={
+                "reservation_id": reservation_id,
+                "event_id": reservation_doc["event_id"],
+                "total_price": total,
+            },
+        )
         return {
             "reservation_id": reservation_id,
             "expires_at": reservation_doc["expires_at"].isoformat(),
@@ -105,20 +169,148 @@ async def create_reservation(payload: ReservationCreateInput = Body(...)):
         }
 
 
+def price_items(
+    tickets: list[dict], items: list[ReservationItem]
+) -> tuple[list[ReservationLine], dict[str, int], float]:
+    """
+    Validate requested items against an event's ticket types and price them.
+
+    Returns the priced lines, the quantity requested per type and the total;
+    raises 400 on unknown types, short stock or mismatched seats.
+    """
+    type_index = {t["type"]: i for i, t in enumerate(tickets)}
+    requested: dict[str, int] = defaultdict(int)
+    lines: list[ReservationLine] = []
+    total = 0.0
+
+    for i in items:
+        ttype = i.type
+        qty = int(i.quantity)
+        if ttype not in type_index:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown ticket type '{ttype}'"
+            )
+        t = tickets[type_index[ttype]]
+        requested[ttype] += qty
+        if t["available"] < requested[ttype]:
+            raise HTTPException(status_code=400, detail=f"Not enough '{ttype}' tickets")
+        if i.seats is not None and (not t.get("seat_map") or len(i.seats) != qty):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Seats for '{ttype}' must match quantity on a seated type",
+            )
+        lines.append(
+            ReservationLine(type=ttype, quantity=qty, price=t["price"], seats=i.seats)
+        )
+        total += float(t["price"]) * qty
+    return lines, requested, total
+
+
+async def _fetch_stock(event_oid: ObjectId) -> dict | None:
+    async with MongoDBConnectionManager() as db:
+        return await db.events.find_one(
+            {"_id": event_oid},
+            {
+                "tickets.type": 1,
+                "tickets.price": 1,
+                "tickets.available": 1,
+                "tickets.seat_map": 1,
+            },
+        )
+
+
+async def _return_stock(
+    db: AsyncIOMotorDatabase, event_oid: ObjectId, requested: dict[str, int]
+) -> None:
+    await db.events.update_one(
+        {"_id": event_oid},
+        {
+            "$inc": {
+                f"tickets.$[t{n}].available": q
+                for n, q in enumerate(requested.values())
+            }
+        },
+        array_filters=[{f"t{n}.type": t} for n, t in enumerate(requested)],
+    )
+
+
+async def _give_back(
+    db: AsyncIOMotorDatabase,
+    event_oid: ObjectId,
+    reservation_oid: ObjectId,
+    seated: list[ReservationLine],
+    stock: dict[str, int] | None,
+) -> None:
+    """
+    Undo the seats and stock (when taken) of a reservation that failed half
+    way. Nothing is undone if the insert landed after all, e.g. a timeout
+    after the write: that reservation holds them and the expiry engine
+    settles it.
+    """
+    try:
+        if stock is not None and await db.reservations.find_one(
+            {"_id": reservation_oid}, {"_id": 1}
+        ):
+            return
+        for line in seated:
+            await release_seats(
+                db,
+                str(event_oid),
+                line.type,
+                [s.model_dump() for s in line.seats],
+            )
+        if stock is not None:
+            await _return_stock(db, event_oid, stock)
+    except Exception:
+        logger.exception(
+            "could not give back a failed reservation",
+            extra={"event_id": str(event_oid), "reservation_id": str(reservation_oid)},
+        )
+
+
+async def _take_stock(
+    db: AsyncIOMotorDatabase, event_oid: ObjectId, requested: dict[str, int]
+) -> None:
+    """Decrement stock per type in one conditional update, or raise 400."""
+    res = await db.events.update_one(
+        {
+            "_id": event_oid,
+            "$and": [
+                {"tickets": {"$elemMatch": {"type": t, "available": {"$gte": q}}}}
+                for t, q in requested.items()
+            ],
+        },
+        {
+            "$inc": {
+                f"tickets.$[t{n}].available": -q
+                for n, q in enumerate(requested.values())
+            }
+        },
+        array_filters=[{f"t{n}.type": t} for n, t in enumerate(requested)],
+    )
+    if res.matched_count == 0:
+        raise HTTPException(status_code=400, detail="Not enough tickets")
+
+
 @router.get("/reservations/{res_id}", response_model=Reservation)
-async def get_reservation(res_id: str):
+async def get_reservation(res_id: str, request: Request, response: Response):
     """
     ## 🧾 Consultar reserva
 
     Retorna los datos de una reserva.
-    Si el tiempo de expiración (`expires_at`) ya pasó, el estado pasa a `EXPIRED`.
+    Si el tiempo de expiración (`expires_at`) ya pasó, el estado se informa como
+    `EXPIRED`; el proceso de expiración la cierra y repone el stock poco después.
+
+    La respuesta incluye `ETag` y `Cache-Control`, pensados para clientes que
+    consultan periódicamente: mientras la reserva está `PENDING` el `max-age`
+    nunca supera su vencimiento, y con `If-None-Match` se responde `304`.
 
     **Ejemplo de respuesta**
     ```json
     {
       "_id": "68f7bb32b3d1304d0e014070",
       "event_id": "68f7b9d771fbcc686dd144e8",
-      "items": [{"type": "General", "quantity": 2}],
+      "items": [{"type": "General", "quantity": 2, "price": 25000.0}],
       "total_price": 50000.0,
       "status": "PENDING",
       "created_at": "2025-10-21T16:39:25.921Z",
@@ -129,19 +321,31 @@ async def get_reservation(res_id: str):
     **Errores**
     - `404 Reservation not found`
     """
+    oid = to_oid(res_id)
     async with MongoDBConnectionManager() as db:
-        doc = await db.reservations.find_one({"_id": to_oid(res_id)})
-        if (
-            doc
-            and doc["status"] == "PENDING"
-            and datetime.now(timezone.utc)
-            > doc["expires_at"].replace(tzinfo=timezone.utc)
-        ):
-            await db.reservations.update_one(
-                {"_id": doc["_id"]}, {"$set": {"status": "EXPIRED"}}
-            )
-            doc["status"] = "EXPIRED"
-        return parse_mongo(doc, Reservation)
+        doc = await find_one_with_archive(db, "reservations", {"_id": oid})
+    reservation = parse_mongo(doc, Reservation)
+
+    max_age = SETTLED_MAX_AGE
+    if reservation.status == "PENDING":
+        remaining = (
+            reservation.expires_at.replace(tzinfo=timezone.utc)
+            - datetime.now(timezone.utc)
+        ).total_seconds()
+        if remaining < 0:
+            reservation.status = "EXPIRED"
+            enqueue_expired_reservation(oid)
+        else:
+            max_age = min(ExpiryConfig.poll_max_age, int(remaining))
+
+    headers = {
+        "ETag": f'"{res_id}-{reservation.status}"',
+        "Cache-Control": f"private, max-age={max_age}",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return reservation
 
 
 @router.delete("/reservations/{res_id}", status_code=204)
@@ -149,14 +353,18 @@ async def cancel_reservation(res_id: str):
     """
     ## ❌ Cancelar reserva
 
-    Elimina una reserva antes de su vencimiento.
+    Elimina una reserva antes de su vencimiento. Si estaba pendiente, sus
+    tickets y asientos vuelven a quedar disponibles.
 
     **Respuesta**
     - `204 No Content` → cancelada correctamente.
     - `404 Not Found` → no existe.
     """
     async with MongoDBConnectionManager() as db:
-        res = await db.reservations.delete_one({"_id": to_oid(res_id)})
-        if res.deleted_count == 0:
+        doc = await db.reservations.find_one_and_delete({"_id": to_oid(res_id)})
+        if not doc:
             raise HTTPException(status_code=404, detail="Reservation not found")
+        if doc["status"] == "PENDING":
+            # Same give-back as the expiry engine: stock, seats and rollups
+            await return_reservation_items(db, [doc], {"held": -1})
         return None
@@ -0,0 +1,131 @@
+import secrets
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException
+from fastapi.responses import Response
+
+from app.config import ScanConfig
+from app.gate import build_snapshot, scan_batch, scan_code
+from app.models.common import to_oid
+from app.models.scan import (
+    ScanBatchInput,
+    ScanBatchResponse,
+    ScanInput,
+    ScanResult,
+)
+
+
+def require_scan_token(x_scan_token: str | None = Header(None)) -> None:
+    """Gate devices only: scans burn tickets and snapshots list valid codes."""
+    token = ScanConfig.token
+    if not (
+        token
+        and x_scan_token
+        and secrets.compare_digest(x_scan_token.encode(), token.encode())
+    ):
+        raise HTTPException(status_code=403, detail="Invalid scan token")
+
+
+router = APIRouter(tags=["Gate"], dependencies=[Depends(require_scan_token)])
+
+
+@router.post("/events/{event_id}/scan", response_model=ScanResult)
+async def scan_ticket(event_id: str, payload: ScanInput = Body(...)):
+    """
+    ## 🚪 Validar ticket en puerta
+
+    Valida un código y lo marca como usado en una sola operación atómica.
+
+    - `VALID` → ticket emitido para el evento y no usado antes: puede entrar.
+    - `ALREADY_USED` → ya se escaneó (en esta u otra puerta).
+    - `INVALID` → el código no fue emitido para este evento.
+    - `CONFLICT` → el código figura en más de una compra (emitido antes de la
+      numeración por evento): no se marca como usado y el personal debe
+      verificar la compra del asistente.
+
+    Los códigos emitidos se mantienen en memoria (filtro de Bloom + conjunto),
+    así que un código inválido se rechaza sin consultar la base de datos. Si la
+    base de datos no responde, el escaneo se acepta con `offline: true` y se
+    registra apenas vuelva la conexión.
+
+    **Ejemplo de solicitud**
+    ```json
+    {"code": "T-4e8-0001", "gate": "norte-1"}
+    ```
+
+    **Ejemplo de respuesta**
+    ```json
+    {"code": "T-4e8-0001", "status": "VALID", "offline": false}
+    ```
+
+    Requiere el encabezado `X-Scan-Token: <SCAN_TOKEN>` del dispositivo de
+    puerta, igual que los demás endpoints de puerta.
+
+    **Errores**
+    - `403 Invalid scan token`
+    - `503` → índice de códigos no disponible (primera carga sin base de datos).
+    """
+    event_id = str(to_oid(event_id))
+    return await scan_code(event_id, payload.code, payload.gate)
+
+
+@router.post("/events/{event_id}/scan/batch", response_model=ScanBatchResponse)
+async def upload_scans(event_id: str, payload: ScanBatchInput = Body(...)):
+    """
+    ## 📤 Subir escaneos acumulados
+
+    Registra los escaneos que un dispositivo hizo sin conexión. Se procesan
+    por `scanned_at`: la primera lectura de un código gana y las siguientes
+    (en el lote o ya registradas) vuelven como `ALREADY_USED`. Los códigos
+    emitidos a más de una compra vuelven como `CONFLICT`.
+
+    **Ejemplo de solicitud**
+    ```json
+    {
+      "scans": [
+        {"code": "T-4e8-0001", "gate": "norte-1", "scanned_at": "2025-12-01T19:02:11Z"}
+      ]
+    }
+    ```
+
+    **Errores**
+    - `403 Invalid scan token`
+    - `503` → no se pudo registrar el lote; reintentar más tarde.
+    """
+    event_id = str(to_oid(event_id))
+    results = await scan_batch(event_id, payload.scans)
+    counts = {status: 0 for status in ("VALID", "ALREADY_USED", "INVALID", "CONFLICT")}
+    for r in results:
+        counts[r.status] += 1
+    return ScanBatchResponse(
+        results=results,
+        valid=counts["VALID"],
+        already_used=counts["ALREADY_USED"],
+        invalid=counts["INVALID"],
+        conflict=counts["CONFLICT"],
+    )
+
+
+@router.get("/events/{event_id}/scan/snapshot")
+async def download_scan_snapshot(event_id: str):
+    """
+    ## 📦 Snapshot para puertas sin conexión
+
+    JSON comprimido con gzip con los códigos emitidos como rangos
+    (`issued.ranges`: `[prefijo, inicio, cantidad]`, más `issued.codes` para
+    códigos fuera de formato), los ya usados (`used`) y un filtro de Bloom de
+    los códigos aún válidos (`valid_bloom`) para dispositivos con poca memoria.
+    Los códigos emitidos a más de una compra van en `conflicts` y quedan fuera
+    del filtro.
+
+    **Errores**
+    - `403 Invalid scan token`
+    """
+    event_id = str(to_oid(event_id))
+    body = await build_snapshot(event_id)
+    return Response(
+        body,
+        media_type="application/gzip",
+        headers={
+            "Content-Disposition": f'attachment; filename="scan-{event_id}.json.gz"'
+        },
+    )
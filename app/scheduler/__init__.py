@@ -1,3 +1,10 @@
-from .motor import start_scheduler, stop_scheduler, scheduler
+def __getattr__(name: str):
+    # Lazy, so importing `app.scheduler.jobs` does not load apscheduler
+    if name in __all__:
+        from . import motor
+
+        return getattr(motor, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["start_scheduler", "stop_scheduler", "scheduler"]
@@ -1,75 +1,212 @@
+import logging
+
 from bson import ObjectId
-from pymongo import UpdateOne
+from typing import TYPE_CHECKING
 from collections import defaultdict
-from datetime import datetime, timezone
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from datetime import datetime, timedelta, timezone
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.archive import move_to_archive
+from app.config import ArchiveConfig, ExpiryConfig, ScanConfig
 from app.database import MongoDBConnectionManager
+from app.gate import flush_pending_scans
+from app.rollups import inc_event_stats
+from app.seating import release_seats
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+logger = logging.getLogger("app.scheduler")
+
+# Reservations seen expired by readers, waiting for the next queue drain
+_expiry_queue: set[ObjectId] = set()
+
+
+def enqueue_expired_reservation(reservation_id: ObjectId) -> None:
+    """
+    Ask the expiry engine to settle a reservation soon, without a write.
+
+    Past `ExpiryConfig.queue_max` ids are dropped; the periodic sweep still
+    settles them.
+    """
+    if len(_expiry_queue) < ExpiryConfig.queue_max:
+        _expiry_queue.add(reservation_id)
+
+
+async def drain_expiry_queue():
+    if not _expiry_queue:
+        return {"reservations": 0, "events_updated": 0}
+    ids = list(_expiry_queue)
+    _expiry_queue.clear()
+    return await restore_expired_reservations_stock(ids)
+
 
+def collect_expired_items(
+    reservations: list[dict],
+) -> tuple[dict[str, dict[str, int]], dict[tuple[str, str], list[dict]]]:
+    """
+    Tickets to give back from expired reservations: quantity per event and
+    type, and seats to release per (event, type).
+    """
+    restore_map = defaultdict(lambda: defaultdict(int))
+    release_map = defaultdict(list)
+    for r in reservations:
+        eid = r.get("event_id")
+        if not eid:
+            continue
+        for it in r.get("items", []):
+            ttype = it.get("type")
+            qty = int(it.get("quantity", 0))
+            if ttype and qty > 0:
+                restore_map[eid][ttype] += qty
+            if ttype and it.get("seats"):
+                release_map[(eid, ttype)].extend(it["seats"])
+    return restore_map, release_map
 
-async def restore_expired_reservations_stock():
+
+async def restore_expired_reservations_stock(ids: list[ObjectId] | None = None):
     now_utc_naive = datetime.now(timezone.utc).replace(tzinfo=None)
+    run_id = ObjectId()
+    query: dict = {"status": "PENDING", "expires_at": {"$lt": now_utc_naive}}
+    if ids is not None:
+        query["_id"] = {"$in": ids}
     async with MongoDBConnectionManager() as db:
-        expired = await db.reservations.find(
-            {"status": "PENDING", "expires_at": {"$lt": now_utc_naive}}
-        ).to_list(length=None)
+        expired = await db.reservations.find(query, {"_id": 1}).to_list(length=None)
         if not expired:
             return {"reservations": 0, "events_updated": 0}
 
-        bulk_ops = [
-            UpdateOne(
-                {"_id": r["_id"], "status": "PENDING"}, {"$set": {"status": "EXPIRED"}}
-            )
-            for r in expired
-        ]
-        await db.reservations.bulk_write(bulk_ops)
-
-        restore_map = defaultdict(lambda: defaultdict(int))
-        for r in expired:
-            eid = r.get("event_id")
-            if not eid:
-                continue
-            for it in r.get("items", []):
-                ttype = it.get("type")
-                qty = int(it.get("quantity", 0))
-                if ttype and qty > 0:
-                    restore_map[eid][ttype] += qty
-
-        events_updated = 0
-        for eid, per_type in restore_map.items():
-            try:
-                event_oid = ObjectId(eid)
-            except Exception:
-                continue
-            event = await db.events.find_one({"_id": event_oid})
-            if not event:
-                continue
-
-            tickets = event.get("tickets", [])
-            type_index = {t["type"]: i for i, t in enumerate(tickets)}
-            changed = False
-            for ttype, qty in per_type.items():
-                if ttype in type_index:
-                    idx = type_index[ttype]
-                    tickets[idx]["available"] = (
-                        int(tickets[idx].get("available", 0)) + qty
-                    )
-                    changed = True
-            if changed:
-                await db.events.update_one(
-                    {"_id": event["_id"]}, {"$set": {"tickets": tickets}}
-                )
-                events_updated += 1
+        # Tag the transition with this run so only reservations it actually
+        # expired (not ones confirmed or expired concurrently) are restored.
+        ids = [r["_id"] for r in expired]
+        await db.reservations.update_many(
+            {"_id": {"$in": ids}, "status": "PENDING"},
+            {"$set": {"status": "EXPIRED", "expired_by": run_id}},
+        )
+        expired = await db.reservations.find(
+            {"_id": {"$in": ids}, "expired_by": run_id}
+        ).to_list(length=None)
 
+        events_updated = await return_reservation_items(
+            db, expired, {"held": -1, "expired": 1}
+        )
         return {"reservations": len(expired), "events_updated": events_updated}
 
 
-def register_jobs(scheduler: AsyncIOScheduler) -> None:
+async def return_reservation_items(
+    db: AsyncIOMotorDatabase, reservations: list[dict], counters: dict[str, int]
+) -> int:
+    """
+    Give the stock and seats of settled PENDING reservations back, and apply
+    `counters` (signs per quantity, as in `item_changes`) to the rollups.
+
+    Stock and rollups go first; seat maps are released one (event, type) at a
+    time and a failure there is logged, so it never strands the rest of the
+    batch. Returns the number of events whose stock was updated.
+    """
+    restore_map, release_map = collect_expired_items(reservations)
+
+    events_updated = 0
+    for eid, per_type in restore_map.items():
+        try:
+            event_oid = ObjectId(eid)
+        except Exception:
+            continue
+        res = await db.events.update_one(
+            {"_id": event_oid},
+            {
+                "$inc": {
+                    f"tickets.$[t{n}].available": qty
+                    for n, qty in enumerate(per_type.values())
+                }
+            },
+            array_filters=[{f"t{n}.type": t} for n, t in enumerate(per_type)],
+        )
+        if res.modified_count:
+            events_updated += 1
+        await inc_event_stats(
+            db,
+            eid,
+            {
+                t: {counter: sign * qty for counter, sign in counters.items()}
+                for t, qty in per_type.items()
+            },
+        )
+
+    for (eid, ttype), seats in release_map.items():
+        try:
+            await release_seats(db, eid, ttype, seats)
+        except Exception:
+            logger.exception(
+                "seat release failed",
+                extra={"event_id": eid, "type": ttype, "seats": len(seats)},
+            )
+    return events_updated
+
+
+# Hot collection sizes around the last archiver run
+archive_stats: dict = {"runs": 0, "last_run": None}
+
+
+async def archive_settled_data():
+    now_utc_naive = datetime.now(timezone.utc).replace(tzinfo=None)
+    targets = {
+        "reservations": {
+            "status": {"$in": ["CONFIRMED", "EXPIRED"]},
+            "expires_at": {
+                "$lt": now_utc_naive
+                - timedelta(days=ArchiveConfig.reservations_after_days)
+            },
+        },
+        "events": {
+            "date": {
+                "$lt": now_utc_naive - timedelta(days=ArchiveConfig.events_after_days)
+            }
+        },
+    }
+    async with MongoDBConnectionManager() as db:
+        run: dict = {"started_at": datetime.now(timezone.utc)}
+        for collection, query in targets.items():
+            before = await db[collection].estimated_document_count()
+            moved = await move_to_archive(
+                db,
+                collection,
+                query,
+                ArchiveConfig.batch_size,
+                ArchiveConfig.max_batches,
+            )
+            after = await db[collection].estimated_document_count()
+            run[collection] = {"before": before, "after": after, "moved": moved}
+
+    archive_stats["runs"] += 1
+    archive_stats["last_run"] = run
+    return run
+
+
+def register_jobs(scheduler: "AsyncIOScheduler") -> None:
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
+
     scheduler.add_job(
         restore_expired_reservations_stock,
         CronTrigger(minute="*/5"),
         id="restore_expired_reservations_stock",
         replace_existing=True,
     )  # Every 5 minutes
-    pass
+    scheduler.add_job(
+        archive_settled_data,
+        CronTrigger(minute=30),
+        id="archive_settled_data",
+        replace_existing=True,
+    )  # Hourly
+    scheduler.add_job(
+        drain_expiry_queue,
+        IntervalTrigger(seconds=ExpiryConfig.drain_seconds),
+        id="drain_expiry_queue",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        flush_pending_scans,
+        IntervalTrigger(seconds=ScanConfig.flush_seconds),
+        id="flush_pending_scans",
+        replace_existing=True,
+    )
@@ -0,0 +1,230 @@
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.models.event import SeatMap, SeatRef
+
+# Compare-and-swap attempts before giving up on a contended seat map
+SEAT_CAS_RETRIES = 8
+
+# A pick is (section index, row index, seat position starting at 0)
+Pick = tuple[int, int, int]
+
+
+def row_to_bytes(free: int, seats: int) -> bytes:
+    return free.to_bytes((seats + 7) // 8, "little")
+
+
+def row_from_bytes(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+def run_starts(free: int, n: int) -> int:
+    """
+    Bitmask of positions where `n` consecutive free seats start.
+
+    Builds runs of length `n` by binary doubling: a run of a+b starts at i when
+    a run of a starts at i and a run of b starts at i+a.
+    """
+    starts, offset = -1, 0
+    runs, length = free, 1
+    while n:
+        if n & 1:
+            starts &= runs >> offset
+            offset += length
+        n >>= 1
+        if n:
+            runs &= runs >> length
+            length *= 2
+    return starts & free
+
+
+def center_start(starts: int, seats: int, n: int) -> int | None:
+    """Start position closest to the middle of the row, or None."""
+    if not starts:
+        return None
+    middle = (seats - n) // 2
+    right = starts >> middle
+    left = starts & ((1 << middle) - 1)
+    candidates = []
+    if right:
+        candidates.append(middle + (right & -right).bit_length() - 1)
+    if left:
+        candidates.append(left.bit_length() - 1)
+    return min(candidates, key=lambda pos: abs(pos - middle))
+
+
+class SeatLayout:
+    """Index of a seat map, translating seat names into bitmap positions."""
+
+    def __init__(self, seat_map: SeatMap) -> None:
+        self.seat_map = seat_map
+        self.sections = {s.name: si for si, s in enumerate(seat_map.sections)}
+        self.rows = [
+            {r.name: ri for ri, r in enumerate(s.rows)} for s in seat_map.sections
+        ]
+        self.seats = [[r.seats for r in s.rows] for s in seat_map.sections]
+
+    def full_rows(self) -> list[list[int]]:
+        return [[(1 << n) - 1 for n in section] for section in self.seats]
+
+    def ref(self, pick: Pick) -> SeatRef:
+        si, ri, pos = pick
+        section = self.seat_map.sections[si]
+        return SeatRef(section=section.name, row=section.rows[ri].name, seat=pos + 1)
+
+    def locate(self, ref: SeatRef) -> Pick:
+        si = self.sections.get(ref.section)
+        ri = self.rows[si].get(ref.row) if si is not None else None
+        if ri is None or ref.seat > self.seats[si][ri]:
+            raise ValueError(f"Unknown seat {ref.section}/{ref.row}/{ref.seat}")
+        return si, ri, ref.seat - 1
+
+    def best_block(self, rows: list[list[int]], n: int) -> list[Pick]:
+        """
+        Pick `n` contiguous seats in the first row, in map order, that has
+        them, centered as much as possible.
+        """
+        for si, section in enumerate(rows):
+            for ri, free in enumerate(section):
+                if free.bit_count() < n:
+                    continue
+                seats = self.seats[si][ri]
+                start = center_start(run_starts(free, n), seats, n)
+                if start is not None:
+                    return [(si, ri, pos) for pos in range(start, start + n)]
+        raise ValueError(f"No block of {n} contiguous seats available")
+
+    def pick_seats(self, rows: list[list[int]], refs: list[SeatRef]) -> list[Pick]:
+        picks = [self.locate(ref) for ref in refs]
+        if len(set(picks)) != len(picks):
+            raise ValueError("Seats must not repeat")
+        for (si, ri, pos), ref in zip(picks, refs):
+            if not rows[si][ri] >> pos & 1:
+                raise ValueError(f"Seat {ref.section}/{ref.row}/{ref.seat} is taken")
+        return picks
+
+
+def seat_map_id(event_id: str, ticket_type: str) -> str:
+    return f"{event_id}:{ticket_type}"
+
+
+async def _load_rows(
+    db: AsyncIOMotorDatabase, key: str, seat_map: SeatMap | None
+) -> tuple[SeatLayout, list[list[int]]] | None:
+    """
+    Layout and free-seat bitsets of a stored seat map, created all free from
+    `seat_map` on first use; None when there is neither.
+
+    The layout always comes from the stored map, never the event's current
+    one, so editing an event cannot reindex rows that are already booked.
+    """
+    doc = await db.seat_maps.find_one({"_id": key})
+    if doc is None:
+        if seat_map is None:
+            return None
+        # First use: every seat free
+        layout = SeatLayout(seat_map)
+        rows = layout.full_rows()
+        await db.seat_maps.update_one(
+            {"_id": key},
+            {
+                "$setOnInsert": {
+                    "seat_map": seat_map.model_dump(),
+                    "rows": [
+                        [row_to_bytes(free, n) for free, n in zip(section, seats)]
+                        for section, seats in zip(rows, layout.seats)
+                    ],
+                }
+            },
+            upsert=True,
+        )
+        doc = await db.seat_maps.find_one({"_id": key})
+    layout = SeatLayout(SeatMap(**doc["seat_map"]))
+    return layout, [[row_from_bytes(b) for b in section] for section in doc["rows"]]
+
+
+async def _swap_rows(
+    db: AsyncIOMotorDatabase,
+    key: str,
+    layout: SeatLayout,
+    rows: list[list[int]],
+    picks: list[Pick],
+    take: bool,
+) -> bool:
+    """Flip the picked seats, only if none of their rows changed meanwhile."""
+    new_rows: dict[tuple[int, int], int] = {}
+    for si, ri, pos in picks:
+        free = new_rows.get((si, ri), rows[si][ri])
+        new_rows[(si, ri)] = free & ~(1 << pos) if take else free | (1 << pos)
+    if all(rows[si][ri] == free for (si, ri), free in new_rows.items()):
+        return True
+
+    def path(si: int, ri: int) -> str:
+        return f"rows.{si}.{ri}"
+
+    res = await db.seat_maps.update_one(
+        {
+            "_id": key,
+            **{
+                path(si, ri): row_to_bytes(rows[si][ri], layout.seats[si][ri])
+                for si, ri in new_rows
+            },
+        },
+        {
+            "$set": {
+                path(si, ri): row_to_bytes(free, layout.seats[si][ri])
+                for (si, ri), free in new_rows.items()
+            }
+        },
+    )
+    return res.modified_count == 1
+
+
+async def allocate_seats(
+    db: AsyncIOMotorDatabase,
+    event_id: str,
+    ticket_type: str,
+    seat_map: SeatMap,
+    quantity: int,
+    seats: list[SeatRef] | None = None,
+) -> list[SeatRef]:
+    """
+    Atomically take the requested seats, or the best `quantity` contiguous ones.
+
+    Each attempt compare-and-swaps only the rows it touches, so reservations in
+    different rows never conflict.
+    """
+    key = seat_map_id(event_id, ticket_type)
+    for _ in range(SEAT_CAS_RETRIES):
+        layout, rows = await _load_rows(db, key, seat_map)
+        try:
+            if seats:
+                picks = layout.pick_seats(rows, seats)
+            else:
+                picks = layout.best_block(rows, quantity)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if await _swap_rows(db, key, layout, rows, picks, take=True):
+            return [layout.ref(p) for p in picks]
+    raise HTTPException(status_code=409, detail="Seat map busy, please retry")
+
+
+async def release_seats(
+    db: AsyncIOMotorDatabase, event_id: str, ticket_type: str, seats: list[dict]
+) -> None:
+    """
+    Mark seats free again; seats already free are left untouched.
+
+    Raises ValueError for seats not in the stored map and RuntimeError when
+    the map stays contended.
+    """
+    key = seat_map_id(event_id, ticket_type)
+    for _ in range(SEAT_CAS_RETRIES):
+        loaded = await _load_rows(db, key, None)
+        if loaded is None:
+            return  # No map stored, so no seat was ever taken
+        layout, rows = loaded
+        picks = [layout.locate(SeatRef(**s)) for s in seats]
+        if await _swap_rows(db, key, layout, rows, picks, take=False):
+            return
+    raise RuntimeError(f"Could not release seats of {key}")
@@ -0,0 +1,54 @@
+import asyncio
+
+from typing import Any, TypeVar
+from collections.abc import Awaitable, Callable, Hashable
+
+T = TypeVar("T")
+
+_groups: dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the coroutine; callers arriving while it is
+    still in flight await the same result (or exception) instead of repeating
+    the work. Results are never cached once the call completes.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        _groups[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        # A cancelled caller (client disconnect) must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved even if every waiter left
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+def singleflight_stats() -> dict[str, dict[str, Any]]:
+    return {name: group.stats() for name, group in _groups.items()}
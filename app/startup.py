@@ -0,0 +1,95 @@
+import time
+import asyncio
+import logging
+
+import pymongo
+
+from typing import Any
+from pymongo.errors import PyMongoError
+
+from app.config import StartupConfig
+from app.database import MongoDBConnectionManager, ensure_indexes
+from app.delivery import start_delivery
+from app.issuing import seed_ticket_counters
+
+logger = logging.getLogger("app.startup")
+
+startup_state: dict[str, Any] = {
+    "started_at": None,
+    "indexes": False,
+    "background": False,
+}
+
+_tasks: list[asyncio.Task] = []
+
+
+async def _create_indexes() -> None:
+    """
+    Indexes and one-off data fixes, retried until MongoDB is reachable;
+    requests are served meanwhile.
+    """
+    while True:
+        try:
+            async with MongoDBConnectionManager() as db:
+                await ensure_indexes(db)
+                startup_state["indexes"] = True
+                # Events from before the ticket counter; checkout also seeds
+                # on demand, this only saves the first buyer the lookup
+                seeded = await seed_ticket_counters(db)
+            if seeded:
+                logger.info("ticket counters seeded", extra={"events": seeded})
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("startup setup failed, retrying", exc_info=True)
+            await asyncio.sleep(StartupConfig.index_retry_seconds)
+
+
+async def _start_background() -> None:
+    """Scheduler and delivery workers, once the first requests are in."""
+    await asyncio.sleep(StartupConfig.defer_seconds)
+    # Imported here: apscheduler is not needed to serve requests
+    from app.scheduler import start_scheduler
+
+    start_scheduler()
+    start_delivery()
+    startup_state["background"] = True
+
+
+def begin_startup() -> None:
+    """Schedule the startup work that must not delay serving."""
+    startup_state["started_at"] = time.time()
+    _tasks.extend(
+        [
+            asyncio.create_task(_create_indexes()),
+            asyncio.create_task(_start_background()),
+        ]
+    )
+
+
+async def cancel_startup() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+async def readiness() -> tuple[bool, dict[str, Any]]:
+    """
+    Whether this instance should receive traffic: MongoDB answers a ping
+    within `StartupConfig.ready_timeout` and the indexes exist.
+    """
+    checks: dict[str, Any] = {}
+    start = time.perf_counter()
+    try:
+        async with MongoDBConnectionManager() as db:
+            with pymongo.timeout(StartupConfig.ready_timeout):
+                await db.command("ping")
+        checks["database"] = "ok"
+    except PyMongoError as e:
+        checks["database"] = f"unavailable: {type(e).__name__}"
+    checks["database_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    checks["indexes"] = startup_state["indexes"]
+    checks["background"] = startup_state["background"]
+    return checks["database"] == "ok" and checks["indexes"], checks
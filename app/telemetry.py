@@ -0,0 +1,215 @@
+import sys
+import copy
+import json
+import time
+import queue
+import random
+import logging
+import secrets
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import TelemetryConfig
+
+logger = logging.getLogger("app")
+span_logger = logging.getLogger("app.trace")
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "trace_id"}
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    sampled: bool
+
+
+_trace: ContextVar[Trace | None] = ContextVar("trace", default=None)
+_span_id: ContextVar[str | None] = ContextVar("span_id", default=None)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hand records to a bounded queue without blocking the event loop.
+
+    Only the cheap parts (message interpolation, trace id) run in the caller;
+    JSON encoding and I/O happen on the listener thread. Records are dropped,
+    and counted, when the queue is full.
+    """
+
+    def __init__(self, q: queue.Queue) -> None:
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        trace = _trace.get()
+        if trace is not None:
+            record.trace_id = trace.trace_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.msg,
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        entry.update((k, v) for k, v in record.__dict__.items() if k not in _RESERVED)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SpanFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.span, default=str)
+
+
+def _queue_handler(logger_: logging.Logger) -> NonBlockingQueueHandler:
+    handler = NonBlockingQueueHandler(queue.Queue(TelemetryConfig.queue_size))
+    logger_.addHandler(handler)
+    return handler
+
+
+# Handlers are attached at import so early records are queued, not lost; the
+# writer threads only start with `start_telemetry()`.
+_log_handler = _queue_handler(logger)
+_span_handler = _queue_handler(span_logger)
+logger.setLevel(TelemetryConfig.log_level)
+logger.propagate = False
+span_logger.setLevel(logging.INFO)
+span_logger.propagate = False
+_listeners: list[QueueListener] = []
+
+
+def _span_sink() -> logging.Handler | None:
+    if TelemetryConfig.trace_exporter == "file":
+        return logging.FileHandler(TelemetryConfig.trace_export_path, delay=True)
+    if TelemetryConfig.trace_exporter == "stdout":
+        return logging.StreamHandler(sys.stdout)
+    return None
+
+
+def start_telemetry() -> None:
+    if _listeners:
+        return
+    stdout = logging.StreamHandler(sys.stdout)
+    stdout.setFormatter(JsonFormatter())
+    _listeners.append(QueueListener(_log_handler.queue, stdout))
+    sink = _span_sink()
+    if sink is not None:
+        sink.setFormatter(SpanFormatter())
+        _listeners.append(QueueListener(_span_handler.queue, sink))
+    for listener in _listeners:
+        listener.start()
+
+
+def stop_telemetry() -> None:
+    """Flush queued records and stop the writer threads."""
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def telemetry_stats() -> dict[str, int]:
+    return {
+        "logs_queued": _log_handler.queue.qsize(),
+        "logs_dropped": _log_handler.dropped,
+        "spans_queued": _span_handler.queue.qsize(),
+        "spans_dropped": _span_handler.dropped,
+    }
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a block as a child span of the current request trace.
+
+    Yields the span attributes so the block can add to them. A no-op (beyond
+    one context lookup) when the request is not sampled.
+    """
+    trace = _trace.get()
+    if trace is None or not trace.sampled:
+        yield attrs
+        return
+    span_id = secrets.token_hex(8)
+    parent = _span_id.get()
+    token = _span_id.set(span_id)
+    started = time.time()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield attrs
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _span_id.reset(token)
+        span_logger.info(
+            "span",
+            extra={
+                "span": {
+                    "trace_id": trace.trace_id,
+                    "span_id": span_id,
+                    "parent_id": parent,
+                    "name": name,
+                    "start": started,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "status": status,
+                    **attrs,
+                }
+            },
+        )
+
+
+class TracingMiddleware:
+    """Start a trace per HTTP request, sampled at `TRACE_SAMPLE_RATE`."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = Trace(
+            trace_id=secrets.token_hex(16),
+            sampled=random.random() < TelemetryConfig.trace_sample_rate,
+        )
+        token = _trace.set(trace)
+        try:
+            with span(
+                "http.request", method=scope["method"], path=scope["path"]
+            ) as attrs:
+
+                async def send_wrapper(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        attrs["status_code"] = message["status"]
+                    await send(message)
+
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(token)
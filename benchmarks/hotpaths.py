@@ -0,0 +1,202 @@
+"""
+Microbenchmarks for the CPU-bound request paths, on synthetic data and with
+no database, compared against the stored baseline in `hotpaths_baseline.json`.
+
+    python -m benchmarks.hotpaths            # compare against the baseline
+    python -m benchmarks.hotpaths --save     # record a new baseline
+    python -m benchmarks.hotpaths -k event   # only cases matching "event"
+
+Times are normalized by a fixed pure-Python calibration loop, so a baseline
+recorded on one machine stays meaningful on another. Exits with status 1 when
+a case is slower than the baseline by more than `--tolerance`.
+"""
+
+import sys
+import json
+import timeit
+import argparse
+import platform
+
+from bson import ObjectId
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from collections.abc import Callable
+
+from app.models.common import parse_mongo
+from app.models.event import Event, PaginatedEvents
+from app.models.purchase import BuyerInfo, Purchase, issue_ticket_ranges
+from app.models.reservation import ReservationItem
+from app.routers.tickets.reservations import price_items
+from app.scheduler.jobs import collect_expired_items
+
+BASELINE = Path(__file__).with_name("hotpaths_baseline.json")
+
+
+def ticket_types(n: int) -> list[dict]:
+    return [
+        {"type": f"Zona {i}", "price": 10000.0 + i, "available": 500} for i in range(n)
+    ]
+
+
+def event_doc(tickets: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "name": "Festival de Verano",
+        "category": "Música",
+        "date": datetime(2025, 12, 1, 20, tzinfo=timezone.utc),
+        "location": "Parque O'Higgins",
+        "image": None,
+        "tickets": ticket_types(tickets),
+    }
+
+
+def reservation_doc(items: int, qty: int) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "_id": ObjectId(),
+        "event_id": "68f7b9d771fbcc686dd144e8",
+        "items": [
+            {"type": f"Zona {i}", "quantity": qty, "price": 10000.0}
+            for i in range(items)
+        ],
+        "total_price": 10000.0 * items * qty,
+        "status": "PENDING",
+        "created_at": now,
+        "expires_at": now + timedelta(minutes=2),
+    }
+
+
+def case_event_parse() -> Callable[[], object]:
+    """parse_mongo(doc, Event) for an event with 1,000 ticket types."""
+    doc = event_doc(1000)
+    return lambda: parse_mongo(doc, Event)
+
+
+def case_events_page_serialize() -> Callable[[], object]:
+    """GET /events response: 50 events x 20 types through PaginatedEvents."""
+    docs = [event_doc(20) for _ in range(50)]
+
+    def run():
+        page = PaginatedEvents(
+            data=[parse_mongo(d, Event) for d in docs], page=1, limit=50, total=500
+        )
+        return json.dumps(page.model_dump(mode="json", by_alias=True))
+
+    return run
+
+
+def case_reservation_pricing() -> Callable[[], object]:
+    """create_reservation validation and pricing: 20 items over 50 types."""
+    tickets = ticket_types(50)
+    items = [ReservationItem(type=f"Zona {i}", quantity=2) for i in range(0, 40, 2)]
+    return lambda: price_items(tickets, items)
+
+
+def case_checkout_tickets() -> Callable[[], object]:
+    """checkout: ticket ranges and the purchase document for 10 x 500 tickets."""
+    reservation = reservation_doc(10, 500)
+    buyer = {"name": "Empresa Demo", "email": "compras@example.com"}
+
+    def run():
+        ranges = issue_ticket_ranges(reservation["event_id"], reservation["items"])
+        return Purchase(
+            reservation_id=str(reservation["_id"]),
+            event_id=reservation["event_id"],
+            ticket_ranges=ranges,
+            buyer=BuyerInfo(**buyer),
+            total_price=reservation["total_price"],
+            confirmed_at=reservation["created_at"],
+        ).model_dump(by_alias=True, exclude={"id", "tickets"})
+
+    return run
+
+
+def case_expiry_restore_map() -> Callable[[], object]:
+    """Expiry sweep: restore/release maps for 5,000 reservations x 3 items."""
+    reservations = []
+    for n in range(5000):
+        r = reservation_doc(3, 2)
+        r["event_id"] = f"68f7b9d771fbcc686dd1{n % 50:04x}"
+        reservations.append(r)
+    return lambda: collect_expired_items(reservations)
+
+
+CASES = {
+    "event_parse": case_event_parse,
+    "events_page_serialize": case_events_page_serialize,
+    "reservation_pricing": case_reservation_pricing,
+    "checkout_tickets": case_checkout_tickets,
+    "expiry_restore_map": case_expiry_restore_map,
+}
+
+
+def calibration() -> None:
+    total = 0
+    for i in range(100_000):
+        total += i % 7
+    d = {}
+    for i in range(20_000):
+        d[str(i)] = i
+
+
+def measure(fn: Callable[[], object], repeat: int) -> float:
+    """Best per-call time in seconds, with the loop count auto-ranged."""
+    number, _ = timeit.Timer(fn).autorange()
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--save", action="store_true", help="write the baseline")
+    parser.add_argument("-k", default="", help="only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.3,
+        help="allowed slowdown over the baseline (0.3 = 30%%)",
+    )
+    args = parser.parse_args()
+
+    unit = measure(calibration, args.repeat)
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    base_cases = baseline.get("cases", {})
+    print(f"⏱️ Calibration loop {unit * 1e3:.2f} ms ({platform.python_version()})\n")
+
+    results, regressions = {}, []
+    for name, build in CASES.items():
+        if args.k not in name:
+            continue
+        per_call = measure(build(), args.repeat)
+        # Normalize by the calibration run right around the case, to absorb
+        # CPU frequency drift and noisy neighbours
+        after = measure(calibration, args.repeat)
+        results[name] = round(per_call / min(unit, after), 5)
+        unit = after
+        line = f"  {name:<24} {per_call * 1e6:>10.1f} µs  {results[name]:>9.4f} u"
+        if name in base_cases:
+            change = results[name] / base_cases[name] - 1
+            line += f"  {change:>+7.1%}"
+            if change > args.tolerance:
+                regressions.append(name)
+                line += "  ❌ regression"
+        else:
+            line += "      (new)"
+        print(line)
+
+    if args.save:
+        cases = {**base_cases, **results}
+        BASELINE.write_text(
+            json.dumps({"python": platform.python_version(), "cases": cases}, indent=2)
+            + "\n"
+        )
+        print(f"\n💾 Baseline written to {BASELINE.name}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline: {regressions}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
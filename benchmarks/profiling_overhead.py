@@ -0,0 +1,94 @@
+"""
+Per-request cost of the profiling hook, in memory through the ASGI stack:
+without the middleware (profiling disabled), with it installed but not
+triggered, and profiling every request.
+
+    python -m benchmarks.profiling_overhead
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+import statistics
+
+import httpx
+
+from fastapi import FastAPI
+
+from app.config import ProfilingConfig
+from app.models.event import Event
+from app.profiling import ProfilingMiddleware, list_profiles
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "2000"))
+EVENTS = int(os.getenv("BENCH_EVENTS", "20"))
+
+DOC = {
+    "_id": "68f7b9d771fbcc686dd144e8",
+    "name": "Concierto",
+    "date": "2025-12-01T20:00:00Z",
+    "location": "Estadio",
+    "category": "Música",
+    "tickets": [
+        {"type": f"T{n}", "price": 10000.0, "available": 100} for n in range(10)
+    ],
+}
+
+
+def build(profiling: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/events")
+    async def events():
+        return [Event(**DOC) for _ in range(EVENTS)]
+
+    if profiling:
+        app.add_middleware(ProfilingMiddleware)
+    return app
+
+
+async def run(app: FastAPI, headers: dict[str, str]) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://b") as c:
+        for _ in range(50):  # warm up
+            await c.get("/events")
+        timings = []
+        for _ in range(REQUESTS):
+            start = time.perf_counter()
+            r = await c.get("/events", headers=headers)
+            timings.append(time.perf_counter() - start)
+            r.raise_for_status()
+    return timings
+
+
+def report(label: str, timings: list[float], base: float | None = None) -> float:
+    mean = statistics.fmean(timings)
+    p50 = statistics.median(timings)
+    extra = f"  {(mean - base) * 1e6:>+7.1f} µs" if base is not None else ""
+    print(f"  {label:<26} mean {mean * 1e6:>7.1f} µs  p50 {p50 * 1e6:>7.1f} µs{extra}")
+    return mean
+
+
+def main():
+    from app.main import app as api
+
+    installed = any(m.cls is ProfilingMiddleware for m in api.user_middleware)
+    print(f"🔬 Profiling hook in app.main with current config: {installed}\n")
+
+    ProfilingConfig.token = "bench"
+    ProfilingConfig.sample_rate = 0
+    ProfilingConfig.directory = tempfile.mkdtemp(prefix="profiles-")
+    print(f"GET /events returning {EVENTS} events, {REQUESTS} requests each\n")
+
+    base = report("disabled (not installed)", asyncio.run(run(build(False), {})))
+    report("installed, not triggered", asyncio.run(run(build(True), {})), base)
+    report(
+        "profiled",
+        asyncio.run(run(build(True), {"X-Profile-Token": "bench"})),
+        base,
+    )
+    print(f"\n{len(list_profiles())} profiles kept in {ProfilingConfig.directory}")
+
+
+if __name__ == "__main__":
+    main()
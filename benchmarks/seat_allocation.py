@@ -0,0 +1,102 @@
+"""
+Seat allocation on a 60,000-seat stadium, in memory: best contiguous block
+selection and specific-seat picks over the row bitsets used by `seat_maps`.
+
+    python -m benchmarks.seat_allocation
+"""
+
+import os
+import time
+import random
+import statistics
+
+from bson import BSON
+
+from app.models.event import SeatMap, SeatRef
+from app.seating import SeatLayout, row_to_bytes
+
+SECTIONS = int(os.getenv("BENCH_SECTIONS", "20"))
+ROWS = int(os.getenv("BENCH_ROWS", "30"))
+SEATS = int(os.getenv("BENCH_SEATS", "100"))
+MAX_GROUP = int(os.getenv("BENCH_MAX_GROUP", "8"))
+
+
+def stadium() -> SeatMap:
+    return SeatMap(
+        sections=[
+            {
+                "name": f"S{s + 1}",
+                "rows": [{"name": str(r + 1), "seats": SEATS} for r in range(ROWS)],
+            }
+            for s in range(SECTIONS)
+        ]
+    )
+
+
+def take(rows: list[list[int]], picks) -> None:
+    for si, ri, pos in picks:
+        rows[si][ri] &= ~(1 << pos)
+
+
+def report(label: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99)]
+    print(
+        f"  {label:<22} {len(timings):>7} allocs  "
+        f"mean {statistics.fmean(timings) * 1e6:>7.1f} µs  p99 {p99 * 1e6:>7.1f} µs"
+    )
+
+
+def main():
+    seat_map = stadium()
+    layout = SeatLayout(seat_map)
+    rng = random.Random(42)
+    print(f"🏟️ {seat_map.capacity} seats ({SECTIONS}x{ROWS}x{SEATS})\n")
+
+    doc = {
+        "rows": [
+            [row_to_bytes(free, n) for free, n in zip(section, seats)]
+            for section, seats in zip(layout.full_rows(), layout.seats)
+        ]
+    }
+    print(f"Availability storage: {len(BSON.encode(doc))} bytes of BSON\n")
+
+    # Sell out with best-available groups of 1..MAX_GROUP
+    rows = layout.full_rows()
+    timings, sold = [], 0
+    while True:
+        n = rng.randint(1, MAX_GROUP)
+        start = time.perf_counter()
+        try:
+            picks = layout.best_block(rows, n)
+        except ValueError:
+            break
+        take(rows, picks)
+        timings.append(time.perf_counter() - start)
+        sold += n
+    print(f"Best contiguous block until first miss ({sold} seats sold)")
+    report("best_block + take", timings)
+
+    # Specific seats on a fresh map, as a seat picker UI would send them
+    rows = layout.full_rows()
+    timings = []
+    free_seats = [
+        (s.name, r.name, n + 1)
+        for s in seat_map.sections
+        for r in s.rows
+        for n in range(r.seats)
+    ]
+    rng.shuffle(free_seats)
+    while free_seats:
+        n = min(rng.randint(1, MAX_GROUP), len(free_seats))
+        refs = [SeatRef(section=s, row=r, seat=seat) for s, r, seat in free_seats[-n:]]
+        del free_seats[-n:]
+        start = time.perf_counter()
+        take(rows, layout.pick_seats(rows, refs))
+        timings.append(time.perf_counter() - start)
+    print("\nSpecific seats until sold out")
+    report("pick_seats + take", timings)
+
+
+if __name__ == "__main__":
+    main()
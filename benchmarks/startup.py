@@ -0,0 +1,74 @@
+"""
+Cold start of the API, each run in a fresh interpreter: time to import
+`app.main`, and time until the first request is answered (import, app
+startup and `GET /`). Medians are checked against `startup_budget.json`.
+
+    python -m benchmarks.startup
+
+Startup must not wait on MongoDB, so this runs the same with or without a
+reachable database.
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+from pathlib import Path
+
+RUNS = int(os.getenv("BENCH_RUNS", "5"))
+BUDGET = Path(__file__).with_name("startup_budget.json")
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from starlette.testclient import TestClient
+with TestClient(app.main.app) as client:
+    status = client.get("/").status_code
+    t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_request_ms": (t2 - t0) * 1000, "status": status}))
+"""
+
+
+def run_once() -> dict:
+    env = {**os.environ, "TRACE_EXPORTER": "none", "PYTHONDONTWRITEBYTECODE": "1"}
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=120,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    budget = json.loads(BUDGET.read_text())
+    runs = [run_once() for _ in range(RUNS)]
+    print(f"🚀 Cold start, median of {RUNS} fresh interpreters\n")
+
+    over = []
+    for key, label in (("import_ms", "import"), ("first_request_ms", "first request")):
+        median = statistics.median(r[key] for r in runs)
+        ok = median <= budget[key]
+        if not ok:
+            over.append(label)
+        print(
+            f"  {label:<15} {median:>8.1f} ms  budget {budget[key]:>6} ms  "
+            f"{'✅' if ok else '❌'}"
+        )
+    if any(r["status"] != 200 for r in runs):
+        print("\nFirst request did not return 200")
+        return 1
+    if over:
+        print(f"\nOver budget: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
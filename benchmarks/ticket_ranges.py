@@ -0,0 +1,72 @@
+"""
+Document size and get_purchase CPU cost for a large order, comparing the
+legacy one-dict-per-ticket layout with range-encoded tickets.
+
+    python -m benchmarks.ticket_ranges
+"""
+
+import os
+import timeit
+
+from bson import BSON, ObjectId
+from datetime import datetime, timezone
+
+from app.models.purchase import Purchase
+
+TICKETS = int(os.getenv("BENCH_TICKETS", "5000"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "20"))
+
+
+def purchase_doc(tickets: int, ranged: bool) -> dict:
+    general, vip = tickets * 4 // 5, tickets - tickets * 4 // 5
+    doc = {
+        "_id": ObjectId(),
+        "reservation_id": str(ObjectId()),
+        "event_id": "68f7b9d771fbcc686dd144e8",
+        "buyer": {"name": "Empresa Demo", "email": "compras@example.com"},
+        "total_price": 25000.0 * general + 60000.0 * vip,
+        "confirmed_at": datetime.now(timezone.utc),
+    }
+    if ranged:
+        doc["ticket_ranges"] = [
+            {"type": "General", "prefix": "T-4e8-", "start": 1, "count": general},
+            {"type": "VIP", "prefix": "T-4e8-", "start": general + 1, "count": vip},
+        ]
+    else:
+        doc["tickets"] = [
+            {"code": f"T-4e8-{seq:04}", "type": "General" if seq <= general else "VIP"}
+            for seq in range(1, tickets + 1)
+        ]
+    return doc
+
+
+def get_purchase(doc: dict, expand: bool = False):
+    """CPU part of GET /purchases/{id}: parse, optionally expand, serialize."""
+    purchase = Purchase(**doc)
+    if expand:
+        purchase = purchase.expanded()
+    return purchase.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+def bench(label: str, fn) -> None:
+    best = min(timeit.repeat(fn, number=1, repeat=REPEAT))
+    print(f"  {label:<28} {best * 1000:>9.2f} ms")
+
+
+def main():
+    legacy = purchase_doc(TICKETS, ranged=False)
+    ranged = purchase_doc(TICKETS, ranged=True)
+
+    print(f"🎫 Purchase with {TICKETS} tickets\n")
+    print("BSON document size")
+    print(f"  {'legacy tickets[]':<28} {len(BSON.encode(legacy)):>9} bytes")
+    print(f"  {'ticket_ranges[]':<28} {len(BSON.encode(ranged)):>9} bytes")
+
+    print("\nget_purchase (parse + serialize, best of %d)" % REPEAT)
+    bench("legacy tickets[]", lambda: get_purchase(legacy))
+    bench("ticket_ranges[]", lambda: get_purchase(ranged))
+    bench("ticket_ranges[] ?expand", lambda: get_purchase(ranged, expand=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import time
+import random
+import asyncio
+import httpx
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+API_BASE = os.getenv("API_BASE", "http://127.0.0.1:8000")
+MEMBERS = os.getenv("RS_MEMBERS", "localhost:27017,localhost:27018,localhost:27019")
+DURATION = float(os.getenv("LOAD_DURATION", "30"))
+CONCURRENCY = int(os.getenv("LOAD_CONCURRENCY", "50"))
+
+
+async def member_stats(host: str) -> dict:
+    client = AsyncIOMotorClient(f"mongodb://{host}/?directConnection=true")
+    try:
+        status = await client.admin.command("serverStatus")
+        hello = await client.admin.command("hello")
+    finally:
+        client.close()
+    extra = status.get("extra_info", {})
+    return {
+        "role": "primary" if hello.get("isWritablePrimary") else "secondary",
+        "queries": status["opcounters"]["query"],
+        "cpu_us": extra.get("user_time_us", 0) + extra.get("system_time_us", 0),
+    }
+
+
+async def snapshot() -> dict[str, dict]:
+    hosts = [h.strip() for h in MEMBERS.split(",") if h.strip()]
+    stats = await asyncio.gather(*(member_stats(h) for h in hosts))
+    return dict(zip(hosts, stats))
+
+
+async def browse(client: httpx.AsyncClient, event_ids: list[str], deadline: float):
+    done = 0
+    while time.monotonic() < deadline:
+        if random.random() < 0.5 or not event_ids:
+            r = await client.get("/events", params={"page": random.randint(1, 3)})
+        else:
+            r = await client.get(f"/events/{random.choice(event_ids)}")
+        r.raise_for_status()
+        done += 1
+    return done
+
+
+async def main():
+    async with httpx.AsyncClient(base_url=API_BASE, timeout=10.0) as client:
+        r = await client.get("/events", params={"limit": 100})
+        r.raise_for_status()
+        event_ids = [e["_id"] for e in r.json()["data"]]
+
+        print(f"🔥 Browsing for {DURATION:.0f}s with {CONCURRENCY} clients...")
+        before = await snapshot()
+        deadline = time.monotonic() + DURATION
+        counts = await asyncio.gather(
+            *(browse(client, event_ids, deadline) for _ in range(CONCURRENCY))
+        )
+        after = await snapshot()
+
+    total = sum(counts)
+    print(f"✅ {total} requests ({total / DURATION:.0f} req/s)\n")
+    print(f"{'member':<20} {'role':<10} {'queries':>10} {'cpu_s':>8}")
+    for host, b in before.items():
+        a = after[host]
+        queries = a["queries"] - b["queries"]
+        cpu_s = (a["cpu_us"] - b["cpu_us"]) / 1e6
+        print(f"{host:<20} {a['role']:<10} {queries:>10} {cpu_s:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,16 @@
+import sys
+import asyncio
+
+from app.rollups import rebuild_event_stats
+
+
+async def main():
+    event_id = sys.argv[1] if len(sys.argv) > 1 else None
+    target = f"event {event_id}" if event_id else "all events"
+    print(f"📊 Rebuilding sales rollups for {target}...")
+    written = await rebuild_event_stats(event_id)
+    print(f"✅ {written} rollup document(s) written.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
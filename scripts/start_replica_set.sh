@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+# Start a local single-host, three-member replica set (rs0) for testing
+# read-preference routing. Data and logs live under ${RS_DIR:-/tmp/ulatickets-rs}.
+#
+#   ./scripts/start_replica_set.sh
+#   MONGO_URI="mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0"
+set -euo pipefail
+
+RS_DIR="${RS_DIR:-/tmp/ulatickets-rs}"
+PORTS=(27017 27018 27019)
+
+for port in "${PORTS[@]}"; do
+  mkdir -p "$RS_DIR/$port"
+  mongod --replSet rs0 --port "$port" --bind_ip localhost \
+    --dbpath "$RS_DIR/$port" --logpath "$RS_DIR/$port.log" --fork
+done
+
+mongosh --quiet --port "${PORTS[0]}" --eval '
+rs.initiate({
+  _id: "rs0",
+  members: [
+    { _id: 0, host: "localhost:27017", priority: 2 },
+    { _id: 1, host: "localhost:27018" },
+    { _id: 2, host: "localhost:27019" },
+  ],
+});
+while (!db.hello().isWritablePrimary) { sleep(500); }
+print("rs0 ready: " + db.hello().hosts.join(","));
+'
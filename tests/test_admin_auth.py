@@ -0,0 +1,37 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import ProfilingConfig
+from app.main import app
+
+ADMIN_ROUTES = ["/admin/metrics/singleflight", "/admin/profiles"]
+
+
+def get(path: str, headers: dict | None = None) -> int:
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return (await client.get(path, headers=headers)).status_code
+
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("path", ADMIN_ROUTES)
+def test_admin_routes_need_the_token(monkeypatch, path):
+    monkeypatch.setattr(ProfilingConfig, "token", "s3cret")
+
+    assert get(path) == 403
+    assert get(path, {"X-Profile-Token": "wrong"}) == 403
+    assert get(path, {"X-Profile-Token": "s3cret"}) == 200
+
+
+@pytest.mark.parametrize("path", ADMIN_ROUTES)
+def test_admin_routes_are_closed_without_a_configured_token(monkeypatch, path):
+    monkeypatch.setattr(ProfilingConfig, "token", None)
+
+    assert get(path, {"X-Profile-Token": ""}) == 403
+    assert get(path, {"X-Profile-Token": "anything"}) == 403
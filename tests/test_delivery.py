@@ -0,0 +1,97 @@
+import asyncio
+
+from bson import ObjectId
+from types import SimpleNamespace
+
+from app.config import DeliveryConfig
+from app.delivery import DeliveryWorkers, new_delivery, _now
+
+
+class FakePurchases:
+    """Just enough of `db.purchases` for claim-guarded updates."""
+
+    def __init__(self, doc: dict) -> None:
+        self.doc = doc
+        self.updates: list[dict] = []
+
+    async def update_one(self, query: dict, update: dict):
+        self.updates.append(update)
+        matched = query["delivery.attempts"] == self.doc["delivery"]["attempts"]
+        if matched:
+            for path, value in update.get("$set", {}).items():
+                self.doc["delivery"][path.split(".", 1)[1]] = value
+        return SimpleNamespace(matched_count=int(matched))
+
+
+class FakeTransport:
+    def __init__(self, on_send=None) -> None:
+        self.sent = []
+        self.on_send = on_send
+
+    async def send(self, message) -> None:
+        self.sent.append(message)
+        if self.on_send:
+            self.on_send(len(self.sent))
+
+
+def make_purchase(tickets: int) -> dict:
+    delivery = new_delivery(_now())
+    delivery["attempts"] = 1
+    return {
+        "_id": ObjectId(),
+        "ticket_ranges": [
+            {"type": "General", "prefix": "T-abc-", "start": 1, "count": tickets}
+        ],
+        "buyer": {"name": "Cliente", "email": "cliente@example.com"},
+        "delivery": delivery,
+    }
+
+
+def run_delivery(purchase: dict, on_send=None):
+    """Deliver `purchase` against a fake stored copy, one ticket per email."""
+    stored = {**purchase, "delivery": dict(purchase["delivery"])}
+    purchases = FakePurchases(stored)
+    transport = FakeTransport(on_send and (lambda n: on_send(stored, n)))
+    workers = DeliveryWorkers()
+    workers.transport = transport
+
+    async def render(tickets):
+        return [b"<svg/>" for _ in tickets]
+
+    workers._render = render
+    asyncio.run(workers._deliver(SimpleNamespace(purchases=purchases), purchase))
+    return workers, transport, purchases
+
+
+def test_stops_sending_when_lease_is_taken_over(monkeypatch):
+    monkeypatch.setattr(DeliveryConfig, "tickets_per_email", 1)
+
+    def reclaim(stored: dict, sent: int) -> None:
+        if sent == 2:  # Lease expired; another worker claimed the purchase
+            stored["delivery"]["attempts"] += 1
+
+    workers, transport, purchases = run_delivery(make_purchase(5), reclaim)
+
+    assert len(transport.sent) == 2
+    assert workers.counters["delivered"] == 0
+    assert workers.counters["lease_lost"] == 1
+    assert purchases.doc["delivery"]["status"] == "PENDING"
+    assert purchases.doc["delivery"]["emails_sent"] == 1
+
+
+def test_renews_lease_with_each_email(monkeypatch):
+    monkeypatch.setattr(DeliveryConfig, "tickets_per_email", 1)
+    claimed_until = _now()
+
+    workers, transport, purchases = run_delivery(make_purchase(3))
+
+    leases = [
+        u["$set"]["delivery.next_attempt_at"]
+        for u in purchases.updates
+        if "delivery.next_attempt_at" in u["$set"]
+    ]
+    assert len(transport.sent) == 3
+    assert len(leases) == 3
+    assert all(lease > claimed_until for lease in leases)
+    assert workers.counters["delivered"] == 1
+    assert purchases.doc["delivery"]["status"] == "SENT"
@@ -0,0 +1,60 @@
+import asyncio
+
+from types import SimpleNamespace
+
+from app.routers.tickets import events
+
+
+class BlockedAggregation:
+    """Facet aggregation that only returns once `release` is set."""
+
+    def __init__(self) -> None:
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    def aggregate(self, pipeline):
+        return self
+
+    async def to_list(self, length=None):
+        self.started.set()
+        await self.release.wait()
+        return [{"category": [], "month": [], "availability": [], "total": []}]
+
+
+def fake_manager(collection):
+    class Manager:
+        def __init__(self, route: str = "primary") -> None:
+            pass
+
+        async def __aenter__(self):
+            return SimpleNamespace(events=collection)
+
+        async def __aexit__(self, *exc) -> None:
+            pass
+
+    return Manager
+
+
+def test_flight_started_before_invalidation_is_not_cached(monkeypatch):
+    async def scenario():
+        aggregation = BlockedAggregation()
+        monkeypatch.setattr(
+            events, "MongoDBConnectionManager", fake_manager(aggregation)
+        )
+        events.facets_cache.clear()
+        coalesced = events.events_flight.coalesced
+
+        first = asyncio.create_task(events.get_event_facets(q=None, category=None))
+        await aggregation.started.wait()
+        # An event is created while the facet query is in flight
+        events.facets_cache.clear()
+        # This request misses the cache and joins the pre-write flight
+        second = asyncio.create_task(events.get_event_facets(q=None, category=None))
+        await asyncio.sleep(0)
+        aggregation.release.set()
+        await asyncio.gather(first, second)
+
+        assert events.events_flight.coalesced == coalesced + 1
+        assert events.facets_cache.get((None, None)) is None
+
+    asyncio.run(scenario())
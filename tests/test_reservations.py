@@ -0,0 +1,167 @@
+import copy
+import asyncio
+
+import pytest
+
+from bson import ObjectId
+from types import SimpleNamespace
+from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
+
+from app.routers.tickets import reservations
+from app.models.reservation import ReservationCreateInput
+from app.seating import row_from_bytes, seat_map_id
+
+SEAT_MAP = {"sections": [{"name": "A", "rows": [{"name": "1", "seats": 10}]}]}
+
+
+def _walk(doc: dict, path: str):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc[int(part)] if isinstance(doc, list) else doc[part]
+    return doc, int(last) if isinstance(doc, list) else last
+
+
+class FakeSeatMaps:
+    """`seat_maps` with the find/upsert/compare-and-swap calls seating uses."""
+
+    def __init__(self) -> None:
+        self.docs: dict[str, dict] = {}
+
+    async def find_one(self, query: dict):
+        doc = self.docs.get(query["_id"])
+        return copy.deepcopy(doc)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        doc = self.docs.get(query["_id"])
+        if doc is None:
+            if upsert and "$setOnInsert" in update:
+                self.docs[query["_id"]] = {
+                    "_id": query["_id"],
+                    **copy.deepcopy(update["$setOnInsert"]),
+                }
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        for path, expected in query.items():
+            if path != "_id":
+                parent, key = _walk(doc, path)
+                if parent[key] != expected:
+                    return SimpleNamespace(matched_count=0, modified_count=0)
+        for path, value in update.get("$set", {}).items():
+            parent, key = _walk(doc, path)
+            parent[key] = value
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+
+class FailingReservations:
+    def __init__(self, error: BaseException, landed: bool = False) -> None:
+        self.error = error
+        self.landed = landed
+        self.docs: dict = {}
+
+    async def insert_one(self, doc: dict):
+        if self.landed:  # Written, but the acknowledgement was lost
+            self.docs[doc["_id"]] = doc
+        raise self.error
+
+    async def find_one(self, query: dict, projection=None):
+        return self.docs.get(query["_id"])
+
+
+def setup(monkeypatch, take_stock_error=None, insert_error=None, landed=False):
+    event_oid = ObjectId()
+    db = SimpleNamespace(
+        seat_maps=FakeSeatMaps(),
+        reservations=FailingReservations(insert_error or AssertionError(), landed),
+        events=SimpleNamespace(update_one=None),
+    )
+
+    class Manager:
+        def __init__(self, route: str = "primary") -> None:
+            pass
+
+        async def __aenter__(self):
+            return db
+
+        async def __aexit__(self, *exc) -> None:
+            pass
+
+    async def fetch_stock(oid):
+        return {
+            "_id": event_oid,
+            "tickets": [
+                {"type": "Platea", "price": 10.0, "available": 10, "seat_map": SEAT_MAP}
+            ],
+        }
+
+    returned = []
+
+    async def take_stock(db, oid, requested):
+        if take_stock_error:
+            raise take_stock_error
+
+    async def return_stock(db, oid, requested):
+        returned.append(requested)
+
+    monkeypatch.setattr(reservations, "MongoDBConnectionManager", Manager)
+    monkeypatch.setattr(reservations, "_fetch_stock", fetch_stock)
+    monkeypatch.setattr(reservations, "_take_stock", take_stock)
+    monkeypatch.setattr(reservations, "_return_stock", return_stock, raising=False)
+    return db, event_oid, returned
+
+
+def free_seats(db, event_oid: ObjectId) -> int:
+    doc = db.seat_maps.docs[seat_map_id(str(event_oid), "Platea")]
+    return sum(row_from_bytes(b).bit_count() for s in doc["rows"] for b in s)
+
+
+def reserve(event_oid: ObjectId):
+    payload = ReservationCreateInput(
+        event_id=str(event_oid), items=[{"type": "Platea", "quantity": 3}]
+    )
+    return asyncio.run(reservations.create_reservation(payload))
+
+
+def test_seats_released_when_taking_stock_fails(monkeypatch):
+    db, event_oid, returned = setup(
+        monkeypatch, take_stock_error=ServerSelectionTimeoutError("no primary")
+    )
+
+    with pytest.raises(PyMongoError):
+        reserve(event_oid)
+
+    assert free_seats(db, event_oid) == 10
+    assert returned == []
+
+
+def test_seats_and_stock_returned_when_insert_fails(monkeypatch):
+    db, event_oid, returned = setup(
+        monkeypatch, insert_error=PyMongoError("write failed")
+    )
+
+    with pytest.raises(PyMongoError):
+        reserve(event_oid)
+
+    assert free_seats(db, event_oid) == 10
+    assert returned == [{"Platea": 3}]
+
+
+def test_seats_released_when_cancelled(monkeypatch):
+    db, event_oid, returned = setup(monkeypatch, insert_error=asyncio.CancelledError())
+
+    with pytest.raises(asyncio.CancelledError):
+        reserve(event_oid)
+
+    assert free_seats(db, event_oid) == 10
+    assert returned == [{"Platea": 3}]
+
+
+def test_nothing_given_back_when_insert_landed(monkeypatch):
+    db, event_oid, returned = setup(
+        monkeypatch, insert_error=PyMongoError("timed out"), landed=True
+    )
+
+    with pytest.raises(PyMongoError):
+        reserve(event_oid)
+
+    # The stored reservation holds them; the expiry engine settles it
+    assert free_seats(db, event_oid) == 7
+    assert returned == []